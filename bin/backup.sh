@@ -32,7 +32,7 @@ DOCKER_STATIC_CONTAINER=$(docker ps -q -f LABEL=com.docker.compose.project=lis -
 
 echo "Archiving media files to $MEDIA_ARCHIVE..."
 docker exec -i "$DOCKER_STATIC_CONTAINER" \
-    sh -c "cd /usr/share/nginx/html/media && tar --exclude ./images -cf - ." > "$MEDIA_ARCHIVE"
+    sh -c "cd /usr/share/nginx/html/media && tar --exclude ./images --exclude ./renditions -cf - ." > "$MEDIA_ARCHIVE"
 
 #echo "Pruning renditions..."
 #DOCKER_CMS_CONTAINER=$(docker ps -q -f LABEL=com.docker.compose.project=lis -f LABEL=com.docker.compose.service=cms)
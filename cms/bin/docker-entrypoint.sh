@@ -8,7 +8,9 @@ if [[ "$1" = 'gunicorn' ]]; then
     # init Django app
     python manage.py migrate
     python manage.py collectstatic --no-input
-    python manage.py update_index
+    # search indexes are only rebuilt if their schema has changed, otherwise pending changes are applied
+    python manage.py update_index --incremental
+    python manage.py updatesearchvectors
 
     # run app as user gunicorn
     exec gosu gunicorn "$@"
@@ -0,0 +1,24 @@
+"""A global content version that invalidates cached API content whenever an editor publishes."""
+
+import time
+
+from django.core.cache import cache
+
+CONTENT_VERSION_KEY = 'api.content_version'
+
+# a version that only changes if pages are published, unpublished or deleted, not if tags or media are edited
+PAGE_VERSION_KEY = 'api.page_version'
+
+
+def get_content_version(key=CONTENT_VERSION_KEY):
+    """Return the current content version."""
+    # starting from the current time makes sure an evicted version is never reused
+    return cache.get_or_set(key, lambda: int(time.time()), None)
+
+
+def bump_content_version(key=CONTENT_VERSION_KEY):
+    """Increment the content version, which renders all cached API content stale."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, int(time.time()), None)
@@ -0,0 +1,45 @@
+"""Groups memorials into grid clusters in the database."""
+
+from django.contrib.gis.db.models import Collect, Extent
+from django.contrib.gis.db.models.functions import Centroid
+from django.db.models import Count, FloatField, Func, Min
+from django.db.models.functions import Floor
+
+from cms.models import Memorial
+
+CLUSTER_MAX_ZOOM = 22
+
+# number of grid cells per 256px map tile along each axis
+CLUSTER_CELLS_PER_TILE = 4
+
+
+class PointX(Func):
+    function = 'ST_X'
+    output_field = FloatField()
+
+
+class PointY(Func):
+    function = 'ST_Y'
+    output_field = FloatField()
+
+
+def cluster_memorials(queryset, zoom):
+    """
+    Return the memorials of the queryset grouped into grid cells of the given zoom level.
+
+    Each cluster is represented by its centroid, its extent, the number of memorials in it
+    and the lowest memorial id, which identifies the memorial of single memorial clusters.
+    """
+    cell_size = 360 / 2 ** zoom / CLUSTER_CELLS_PER_TILE
+
+    return Memorial.objects.filter(
+        pk__in=queryset.order_by().values('pk')
+    ).annotate(
+        cell_x=Floor(PointX('coordinates') / cell_size),
+        cell_y=Floor(PointY('coordinates') / cell_size),
+    ).order_by().values('cell_x', 'cell_y').annotate(
+        memorial_id=Min('pk'),
+        count=Count('pk'),
+        centroid=Centroid(Collect('coordinates')),
+        extent=Extent('coordinates'),
+    )
@@ -0,0 +1,39 @@
+"""A columnar representation of all memorials for the initial map view."""
+
+from collections import OrderedDict
+
+from api.clusters import PointX, PointY
+from api.expressions import memorial_type_ids
+
+# about one meter, which is more than enough to place a marker
+COMPACT_PRECISION = 5
+
+
+def compact_memorials(queryset, names=False):
+    """
+    Return the memorials of the queryset as parallel arrays of ids, positions and memorial type ids.
+
+    All columns are selected by a single query without instantiating any model or serializer.
+    """
+    fields = ['pk', 'compact_lat', 'compact_lng', 'compact_types']
+    if names:
+        fields.append('name')
+
+    rows = queryset.order_by('pk').annotate(
+        compact_lat=PointY('coordinates'),
+        compact_lng=PointX('coordinates'),
+        compact_types=memorial_type_ids(),
+    ).values_list(*fields)
+
+    columns = list(zip(*rows)) or [()] * len(fields)
+    data = OrderedDict([
+        ('count', len(columns[0])),
+        ('ids', columns[0]),
+        ('lat', [round(x, COMPACT_PRECISION) for x in columns[1]]),
+        ('lng', [round(x, COMPACT_PRECISION) for x in columns[2]]),
+        ('types', columns[3]),
+    ])
+    if names:
+        data['names'] = columns[4]
+
+    return data
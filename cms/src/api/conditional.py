@@ -0,0 +1,39 @@
+"""Validators that allow to answer conditional API requests without serializing any content."""
+
+from hashlib import md5
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, Max, Q
+from django.utils.translation import get_language
+from wagtail.core.models import Page
+
+from api.cache import get_content_version
+
+
+def get_page_etag(models):
+    """
+    Return an ETag for the pages of the given models.
+
+    It changes whenever a page of one of the models is edited, published or unpublished and with
+    the content version, e.g. if tags or images are edited. There is no last modified timestamp
+    that covers all of these, so clients can only revalidate by the ETag.
+    """
+    content_types = ContentType.objects.get_for_models(*models).values()
+    aggregates = Page.objects.filter(content_type__in=content_types).aggregate(
+        latest_revision_created_at=Max('latest_revision_created_at'),
+        last_published_at=Max('last_published_at'),
+        live_count=Count('pk', filter=Q(live=True)),
+    )
+
+    validator = '{language}:{version}:{latest_revision_created_at}:{last_published_at}:{live_count}'.format(
+        language=get_language(),
+        version=get_content_version(),
+        **aggregates
+    )
+    return md5(validator.encode()).hexdigest()
+
+
+def get_suggestion_etag(version):
+    """Return an ETag for suggestions served from the in-process indexes of the given page version."""
+    validator = '{language}:{version}'.format(language=get_language(), version=version)
+    return md5(validator.encode()).hexdigest()
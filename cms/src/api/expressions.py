@@ -0,0 +1,95 @@
+"""Database expressions shared by the API querysets."""
+
+from django.contrib.gis.db.models import GeometryField
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+from django.db.models import F, Func, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce, NullIf
+
+from cms.models import Memorial
+
+
+class ArraySubquery(Subquery):
+    """A subquery that returns its single column as a postgres array."""
+
+    template = 'ARRAY(%(subquery)s)'
+
+
+class ArrayToString(Func):
+    function = 'array_to_string'
+    output_field = models.CharField()
+
+
+class ArrayPosition(Func):
+    """The position of a value in an array of integers, e.g. to order rows by a list of ids."""
+
+    function = 'array_position'
+    output_field = models.IntegerField()
+
+    def __init__(self, values, expression, **extra):
+        values = Value(list(values), output_field=ArrayField(models.IntegerField()))
+        super().__init__(values, expression, **extra)
+
+
+class Unaccent(Func):
+    """Removes the accents of a string by the immutable wrapper of unaccent, as used by the name indexes."""
+
+    function = 'lis_unaccent'
+    output_field = models.CharField()
+
+
+class WordSimilar(Func):
+    """True if the first string is similar to any part of the second string, see the `<%` operator of pg_trgm."""
+
+    template = '(%(expressions)s)'
+    arg_joiner = ' <%% '
+    output_field = models.BooleanField()
+
+
+class WordSimilarity(Func):
+    function = 'word_similarity'
+    output_field = models.FloatField()
+
+
+class MakeEnvelope(Func):
+    function = 'ST_MakeEnvelope'
+    output_field = GeometryField()
+
+    def __init__(self, xmin, ymin, xmax, ymax, srid, **extra):
+        values = (Value(float(x)) for x in (xmin, ymin, xmax, ymax))
+        super().__init__(*values, Value(srid), **extra)
+
+
+class AsMVTGeom(Func):
+    function = 'ST_AsMVTGeom'
+    output_field = GeometryField(srid=3857)
+
+    def __init__(self, geometry, bounds, extent=4096, buffer=256, clip_geom=True, **extra):
+        super().__init__(geometry, bounds, Value(extent), Value(buffer), Value(clip_geom), **extra)
+
+
+def memorial_type_ids(outer_ref='pk'):
+    """Return an expression that selects the memorial type ids of a memorial as an array."""
+    through = Memorial.memorial_type_tags.through
+    queryset = through.objects.filter(memorial_id=OuterRef(outer_ref)).order_by('memorialtag_id')
+    return ArraySubquery(
+        queryset.values('memorialtag_id'),
+        output_field=ArrayField(models.IntegerField())
+    )
+
+
+def author_name(language, unaccent=False):
+    """
+    Return an expression of the first, last and birth name of author names in the given language.
+
+    The expression has to match the trigram indexes of migration cms.0056 exactly to be able to use them.
+    """
+    fields = []
+    for name in ('first_name', 'last_name', 'birth_name'):
+        if language == 'en':
+            fields.append(F(name))
+        else:
+            fields.append(Coalesce(NullIf(F(f'{name}_{language}'), Value('')), F(name)))
+
+    expression = Func(*fields, function='lis_author_name', output_field=models.CharField())
+    return Unaccent(expression) if unaccent else expression
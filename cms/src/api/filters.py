@@ -1,13 +1,24 @@
+import re
+from hashlib import md5
+
 import django_filters
-from django.db.models import Q
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db.models import F, Max, Q, Value
+from django.db.models.functions import Greatest
 from django.template import loader
-from django.utils.translation import gettext as _
+from django.utils.translation import gettext as _, get_language
 from rest_framework.exceptions import ParseError
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import BaseFilterBackend, SearchFilter
 from rest_framework_gis.filters import InBBoxFilter, DistanceToPointFilter
 from wagtail.search.backends import get_search_backend
 
-from cms.models import Author, Memorial, GenreTag, LanguageTag, PeriodTag, MemorialTag
+from api.cache import get_content_version
+from api.expressions import ArrayPosition, Unaccent, WordSimilar, WordSimilarity, author_name
+from cms.fulltext import SEARCH_CONFIGS, SEARCH_VECTOR_MODELS, get_search_column
+from cms.models import Author, AuthorName, Memorial, GenreTag, LanguageTag, PeriodTag, MemorialTag
 
 GENDER_CHOICES = (
     ('F', _('Female')),
@@ -60,21 +71,80 @@ class MemorialFilterSet(django_filters.FilterSet):
 
 
 class PostgresSearchFilter(SearchFilter):
+    """
+    Filters by the search index and caches the ranked ids of the results.
+
+    The cache key covers the normalized query, the operator, the language, the ordering mode and
+    the SQL of the filtered queryset, entries are invalidated by the content version.
+    """
 
     def filter_queryset(self, request, queryset, view):
         if 'search' in request.GET:
 
-            search_query = request.GET['search']
+            search_query = ' '.join(request.GET['search'].lower().split())
             search_operator = request.GET.get('search_operator', None)
             order_by_relevance = 'ordering' not in request.GET
-            sb = get_search_backend()
-            queryset = sb.autocomplete(
-                search_query,
-                queryset,
-                operator=search_operator,
-                order_by_relevance=order_by_relevance
-            )
 
+            result_ids = self.get_result_ids(queryset, search_query, search_operator, order_by_relevance)
+            if not result_ids:
+                # an empty id list would make the SQL of the queryset impossible to compile
+                return queryset.none()
+            queryset = queryset.filter(pk__in=result_ids)
+            if order_by_relevance:
+                queryset = queryset.order_by(ArrayPosition(result_ids, F('pk')))
+
+        return queryset
+
+    def get_result_ids(self, queryset, search_query, search_operator, order_by_relevance):
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return []
+        key = md5(repr((
+            search_query,
+            search_operator,
+            get_language(),
+            order_by_relevance,
+            sql,
+            params,
+        )).encode()).hexdigest()
+        key = f'api.search.{get_content_version()}.{key}'
+
+        result_ids = cache.get(key)
+        if result_ids is None:
+            if issubclass(queryset.model, SEARCH_VECTOR_MODELS) and get_language() in SEARCH_CONFIGS:
+                results = self.search_vectors(queryset, search_query, search_operator, order_by_relevance)
+                result_ids = list(results.values_list('pk', flat=True))
+            else:
+                sb = get_search_backend()
+                results = sb.autocomplete(
+                    search_query,
+                    queryset,
+                    operator=search_operator,
+                    order_by_relevance=order_by_relevance
+                )
+                result_ids = [obj.pk for obj in results]
+            cache.set(key, result_ids, settings.API_CACHE_SECONDS)
+
+        return result_ids
+
+    def search_vectors(self, queryset, search_query, search_operator, order_by_relevance):
+        """Match the terms as prefixes against the stored search vectors of the current language."""
+        terms = re.findall(r'\w+', search_query)
+        if not terms:
+            return queryset.none()
+
+        column = get_search_column()
+        connector = ' & ' if search_operator == 'and' else ' | '
+        query = SearchQuery(
+            connector.join(f'{term}:*' for term in terms),
+            config=SEARCH_CONFIGS[get_language()],
+            search_type='raw',
+        )
+
+        queryset = queryset.filter(**{column: query})
+        if order_by_relevance:
+            queryset = queryset.annotate(rank=SearchRank(F(column), query)).order_by('-rank', 'pk')
         return queryset
 
     def to_html(self, request, queryset, view):
@@ -88,6 +158,72 @@ class PostgresSearchFilter(SearchFilter):
         return template.render(context)
 
 
+class AuthorSimilarityFilter(BaseFilterBackend):
+    """
+    Filters authors by names that are similar to the query, e.g. `?similar=göthe`.
+
+    Names are matched with and without accents by the trigram indexes of the current language and
+    the authors are ranked by their most similar name unless another ordering is requested.
+    """
+
+    similar_param = 'similar'
+
+    def filter_queryset(self, request, queryset, view):
+        similar_query = ' '.join(request.GET.get(self.similar_param, '').lower().split())
+        if not similar_query:
+            return queryset
+
+        order_by_relevance = 'ordering' not in request.GET
+        result_ids = self.get_result_ids(queryset, similar_query)
+        if not result_ids:
+            return queryset.none()
+        queryset = queryset.filter(pk__in=result_ids)
+        if order_by_relevance:
+            queryset = queryset.order_by(ArrayPosition(result_ids, F('pk')))
+
+        return queryset
+
+    def get_result_ids(self, queryset, similar_query):
+        language = get_language() if get_language() in SEARCH_CONFIGS else 'en'
+        key = md5(repr((similar_query, language)).encode()).hexdigest()
+        key = f'api.similar.{get_content_version()}.{key}'
+
+        result_ids = cache.get(key)
+        if result_ids is None:
+            name = author_name(language)
+            unaccented_name = author_name(language, unaccent=True)
+            unaccented_query = Unaccent(Value(similar_query))
+
+            names = AuthorName.objects.filter(
+                Q(WordSimilar(Value(similar_query), name))
+                | Q(WordSimilar(unaccented_query, unaccented_name))
+            ).values('author_id').annotate(
+                similarity=Max(Greatest(
+                    WordSimilarity(Value(similar_query), name),
+                    WordSimilarity(unaccented_query, unaccented_name),
+                ))
+            ).order_by('-similarity', 'author_id')
+
+            # the ranking is cached for all authors, the filtered queryset narrows it down
+            result_ids = [row['author_id'] for row in names]
+            cache.set(key, result_ids, settings.API_CACHE_SECONDS)
+
+        return result_ids
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.similar_param,
+                'required': False,
+                'in': 'query',
+                'description': _('Names similar to this term, tolerating typos and missing accents.'),
+                'schema': {
+                    'type': 'string',
+                },
+            },
+        ]
+
+
 class BoundingBoxFilter(InBBoxFilter):
     bbox_param = 'bbox'
 
@@ -0,0 +1,62 @@
+"""Loaders that resolve related API content of many pages in a fixed number of queries."""
+
+from collections import OrderedDict, defaultdict
+
+from django.utils.translation import get_language
+
+from api.cache import get_content_version
+from api.querysets import annotate_popular_name
+from api.serializers import AuthorListSerializer
+from cms.models import Author, Memorial, MemorialTag
+
+# memorial type lookup tables by language and content version
+_memorial_type_lookups = {}
+
+
+def load_author_summaries(memorial_ids, context=None):
+    """
+    Return the serialized live and public authors remembered by each of the given memorials.
+
+    The result maps memorial ids to lists of author summaries ordered like the page tree. Names,
+    title images and urls of all authors are resolved in three queries regardless of their number.
+    """
+    through = Memorial.remembered_authors.through
+    links = through.objects.filter(memorial_id__in=memorial_ids).values_list('memorial_id', 'author_id')
+
+    author_ids = defaultdict(set)
+    for memorial_id, author_id in links:
+        author_ids[memorial_id].add(author_id)
+
+    all_ids = set().union(*author_ids.values())
+    if not all_ids:
+        return {}
+
+    queryset = annotate_popular_name(Author.objects.filter(pk__in=all_ids))
+    queryset = queryset.select_related('title_image').prefetch_related('names').live().public().order_by('path')
+    summaries = AuthorListSerializer(queryset, many=True, context=context or {}).data
+
+    return {
+        memorial_id: [summary for summary in summaries if summary['id'] in ids]
+        for memorial_id, ids in author_ids.items()
+    }
+
+
+def get_memorial_type_lookup():
+    """
+    Return the memorial types of the current language by id, in their default order.
+
+    The table is kept in process until the content version changes, e.g. if a tag is edited.
+    """
+    version = get_content_version()
+    key = (get_language(), version)
+
+    lookup = _memorial_type_lookups.get(key)
+    if lookup is None:
+        tags = MemorialTag.objects.values('id', 'name')
+        lookup = OrderedDict((tag['id'], tag) for tag in tags)
+
+        for stale_key in [x for x in _memorial_type_lookups if x[1] != version]:
+            _memorial_type_lookups.pop(stale_key, None)
+        _memorial_type_lookups[key] = lookup
+
+    return lookup
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from api.models import Snapshot
+from api.snapshots import build_all_snapshots
+
+
+class Command(BaseCommand):
+    """Used to rebuild the API snapshots of all pages."""
+
+    help = "Render the API snapshots of all public authors, memorials and memorial paths."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help="Delete all snapshots before rebuilding them.",
+        )
+
+    def handle(self, *args, **kwargs):
+        if kwargs['clear']:
+            count, _ = Snapshot.objects.all().delete()
+            self.stdout.write(self.style.SUCCESS(f"Deleted {count} snapshots."))
+
+        count = build_all_snapshots()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the snapshots of {count} pages."))
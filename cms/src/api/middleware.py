@@ -0,0 +1,83 @@
+"""Middleware to cache API responses until the content changes."""
+
+import re
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.cache import get_cache_key, get_conditional_response, has_vary_header, learn_cache_key
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.translation import get_language
+
+from api.cache import get_content_version
+from api.snapshots import SNAPSHOT_SCHEMA
+
+
+class VersionedCacheMiddleware(MiddlewareMixin):
+    """
+    Caches API responses by path, query string, language, content version and code.
+
+    Other than the fixed timeout of Django's cache middleware, entries become stale as soon
+    as the content version is bumped by an editor and can therefore live for hours.
+    Needs to be placed after the LocaleMiddleware.
+    """
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self.cache = caches[settings.CACHE_MIDDLEWARE_ALIAS]
+        self.cache_timeout = settings.API_CACHE_SECONDS
+        self.urls_regex = re.compile(settings.API_CACHE_URLS_REGEX)
+
+    def get_key_prefix(self):
+        # the content version survives deploys, responses of other code are identified by its schema
+        return 'api.{schema}.{version}.{language}'.format(
+            schema=SNAPSHOT_SCHEMA,
+            version=get_content_version(),
+            language=get_language(),
+        )
+
+    def process_request(self, request):
+        request._api_cache_update = False
+        if request.method not in ('GET', 'HEAD') or not self.urls_regex.match(request.path_info):
+            return None
+
+        request._api_cache_key_prefix = self.get_key_prefix()
+        cache_key = get_cache_key(request, request._api_cache_key_prefix, 'GET', cache=self.cache)
+        response = self.cache.get(cache_key) if cache_key else None
+        if response is None:
+            request._api_cache_update = True
+            return None
+
+        return get_conditional_response(
+            request,
+            etag=response.get('ETag'),
+            response=response,
+        )
+
+    def process_response(self, request, response):
+        if not getattr(request, '_api_cache_update', False):
+            return response
+
+        if response.streaming or response.status_code != 200:
+            return response
+
+        # responses that set cookies for anonymous users must not be shared
+        if not request.COOKIES and response.cookies and has_vary_header(response, 'Cookie'):
+            return response
+
+        if 'private' in response.get('Cache-Control', ()):
+            return response
+
+        cache_key = learn_cache_key(
+            request,
+            response,
+            self.cache_timeout,
+            request._api_cache_key_prefix,
+            cache=self.cache,
+        )
+        if hasattr(response, 'render') and callable(response.render):
+            response.add_post_render_callback(
+                lambda r: self.cache.set(cache_key, r, self.cache_timeout)
+            )
+        else:
+            self.cache.set(cache_key, response, self.cache_timeout)
+        return response
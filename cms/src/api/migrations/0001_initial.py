@@ -0,0 +1,31 @@
+import django.contrib.postgres.fields.jsonb
+import django.db.models.deletion
+import rest_framework.utils.encoders
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('wagtailcore', '0040_page_draft_title'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Snapshot',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('author', 'Author'), ('memorial', 'Memorial'), ('path', 'Memorial path'), ('discover', 'Discover'), ('research', 'Research'), ('material', 'Material')], max_length=16)),
+                ('language', models.CharField(max_length=7)),
+                ('payload', django.contrib.postgres.fields.jsonb.JSONField(encoder=rest_framework.utils.encoders.JSONEncoder)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('page', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='wagtailcore.Page')),
+            ],
+            options={
+                'db_table': 'api_snapshot',
+                'unique_together': {('page', 'kind', 'language')},
+            },
+        ),
+    ]
@@ -1 +1,35 @@
-# Create your models here.
+from django.contrib.postgres.fields import JSONField
+from django.db import models
+from rest_framework.utils.encoders import JSONEncoder
+from wagtail.core.models import Page
+
+
+class Snapshot(models.Model):
+    """The rendered API payload of a page in a single language."""
+
+    KIND_AUTHOR = 'author'
+    KIND_MEMORIAL = 'memorial'
+    KIND_PATH = 'path'
+    KIND_DISCOVER = 'discover'
+    KIND_RESEARCH = 'research'
+    KIND_MATERIAL = 'material'
+    KINDS = (
+        (KIND_AUTHOR, 'Author'),
+        (KIND_MEMORIAL, 'Memorial'),
+        (KIND_PATH, 'Memorial path'),
+        (KIND_DISCOVER, 'Discover'),
+        (KIND_RESEARCH, 'Research'),
+        (KIND_MATERIAL, 'Material'),
+    )
+
+    page = models.ForeignKey(Page, on_delete=models.CASCADE, related_name='+')
+    kind = models.CharField(max_length=16, choices=KINDS)
+    language = models.CharField(max_length=7)
+    payload = JSONField(encoder=JSONEncoder)
+    # hash of the serializers that rendered the payload, see api.snapshots.SNAPSHOT_SCHEMA
+    schema = models.CharField(max_length=32, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'api_snapshot'
+        unique_together = ('page', 'kind', 'language')
@@ -1,26 +1,147 @@
 from collections import OrderedDict
+from hashlib import md5
 
+from django.conf import settings
+from django.contrib.gis.db.models import Extent
 from django.contrib.gis.geos import Point, MultiPoint
-from rest_framework import pagination
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.db.models import Count, QuerySet
+from rest_framework import filters, pagination
 from rest_framework.response import Response
 
+from api.cache import get_content_version
+
+DEFAULT_BBOX = ((12.1898, 49.9664), (15.5079, 51.4444))
+
+
+def get_cached_aggregate(queryset, **aggregates):
+    """Return the aggregates over the queryset, cached by the SQL of the queryset and the content version."""
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        # empty querysets are aggregated without a query, e.g. to a count of 0
+        return queryset.aggregate(**aggregates)
+    key = md5(repr((sql, params, sorted(aggregates.items()))).encode()).hexdigest()
+    key = f'api.aggregate.{get_content_version()}.{key}'
+
+    value = cache.get(key)
+    if value is None:
+        value = queryset.aggregate(**aggregates)
+        cache.set(key, value, settings.API_CACHE_SECONDS)
+
+    return value
+
+
+class MemorialPaginationMixin:
+    """Aggregates the count and the bounding box of the whole memorial result set."""
+
+    def aggregate_queryset(self, queryset):
+        self.aggregates = None
+        if isinstance(queryset, QuerySet):
+            # count and extent of the whole result set are computed within a single query
+            self.aggregates = get_cached_aggregate(
+                queryset,
+                count=Count('pk'),
+                extent=Extent('coordinates'),
+            )
+
+    def get_bbox(self, data):
+        if self.aggregates is not None:
+            if self.aggregates['count'] < 2:
+                return DEFAULT_BBOX
+            xmin, ymin, xmax, ymax = self.aggregates['extent']
+            return (xmin, ymin), (xmax, ymax)
+
+        # results that are no querysets can not be aggregated, use the current page instead
+        if len(data) < 2:
+            return DEFAULT_BBOX
+        points = [Point(memorial['position']) for memorial in data]
+        bbox = MultiPoint(points).envelope
+        return bbox.coords[0][0], bbox.coords[0][2]
+
+
+class MemorialPagination(MemorialPaginationMixin, pagination.LimitOffsetPagination):
+    def paginate_queryset(self, queryset, request, view=None):
+        self.aggregate_queryset(queryset)
+        return super().paginate_queryset(queryset, request, view=view)
+
+    def get_count(self, queryset):
+        if self.aggregates is not None:
+            return self.aggregates['count']
+        return super().get_count(queryset)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+            ('bbox', self.get_bbox(data)),
+        ]))
+
+
+class KeysetPagination(pagination.CursorPagination):
+    """
+    Paginates by the indexed and unique tree path or id of pages using an opaque cursor.
+
+    Other than offset based pagination the cost of a page does not depend on its depth.
+    The total count is served from the aggregate cache.
+    """
+
+    ordering = 'path'
+    page_size_query_param = 'limit'
+
+    # a cursor only points to a single row if the ordering is unique, it is fast if the ordering is indexed
+    keyset_orderings = ('path', 'id')
+
+    @classmethod
+    def is_requested(cls, request):
+        """Return True if the client asks for keyset pagination by sending a cursor."""
+        # search results are ordered by relevance, which is no position a cursor could point to
+        if cls.cursor_query_param not in request.query_params:
+            return False
+        if 'search' in request.query_params or 'similar' in request.query_params:
+            return False
+
+        # other orderings are paginated by offset
+        ordering = request.query_params.get(filters.OrderingFilter.ordering_param, '')
+        return not ordering or cls.is_keyset_ordering(ordering.split(','))
+
+    @classmethod
+    def is_keyset_ordering(cls, ordering):
+        return len(ordering) == 1 and ordering[0].strip().lstrip('-') in cls.keyset_orderings
+
+    def get_ordering(self, request, queryset, view):
+        ordering = filters.OrderingFilter().get_ordering(request, queryset, view) or self.ordering
+        if isinstance(ordering, str):
+            ordering = (ordering,)
+        if not self.is_keyset_ordering(ordering):
+            ordering = (self.ordering,)
+        return tuple(ordering)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count = self.get_count(queryset)
+        return super().paginate_queryset(queryset, request, view=view)
+
+    def get_count(self, queryset):
+        return get_cached_aggregate(queryset, count=Count('pk'))['count']
 
-class MemorialPagination(pagination.LimitOffsetPagination):
     def get_paginated_response(self, data):
-        if len(data) >= 2:
-            points = [Point(memorial['position']) for memorial in data]
-            bbox = MultiPoint(points).envelope
-        else:
-            bbox = MultiPoint(
-                Point(12.1898, 49.9664),
-                Point(15.5079, 49.9664),
-                Point(15.5079, 51.4444),
-                Point(12.1898, 51.4444),
-            ).envelope
         return Response(OrderedDict([
             ('count', self.count),
             ('next', self.get_next_link()),
             ('previous', self.get_previous_link()),
             ('results', data),
-            ('bbox', (bbox.coords[0][0], bbox.coords[0][2])),
         ]))
+
+
+class MemorialKeysetPagination(MemorialPaginationMixin, KeysetPagination):
+    def get_count(self, queryset):
+        self.aggregate_queryset(queryset)
+        return self.aggregates['count']
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        response.data['bbox'] = self.get_bbox(data)
+        return response
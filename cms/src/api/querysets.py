@@ -0,0 +1,31 @@
+"""Querysets shared by the API views and serializers."""
+
+from django.db.models import OuterRef, Prefetch, Subquery
+
+from api.expressions import memorial_type_ids
+from cms.models import AuthorName, Memorial, Waypoint
+
+
+def annotate_popular_name(queryset):
+    """Annotate an author queryset with the components of the most popular name of each author."""
+    popular_name_qs = AuthorName.objects.filter(author_id=OuterRef('pk')).order_by('sort_order')[:1]
+    return queryset.annotate(
+        academic_title=Subquery(popular_name_qs.values('title')),
+        first_name=Subquery(popular_name_qs.values('first_name')),
+        last_name=Subquery(popular_name_qs.values('last_name')),
+        birth_name=Subquery(popular_name_qs.values('birth_name')),
+    )
+
+
+def prefetch_waypoints(to_attr='public_waypoints'):
+    """
+    Return a prefetch of the ordered waypoints of memorial paths that lead to live and public memorials.
+
+    The memorials are loaded with their translated names, title images and memorial types, so
+    any number of paths is resolved in a constant number of queries.
+    """
+    memorials_qs = Memorial.objects.select_related('title_image').annotate(memorial_type_ids=memorial_type_ids())
+    waypoints_qs = Waypoint.objects.filter(
+        memorial__in=Memorial.objects.live().public()
+    ).order_by('sort_order').prefetch_related(Prefetch('memorial', queryset=memorials_qs))
+    return Prefetch('waypoints', queryset=waypoints_qs, to_attr=to_attr)
@@ -0,0 +1,27 @@
+from rest_framework.negotiation import BaseContentNegotiation
+from rest_framework.renderers import BaseRenderer
+
+
+class VectorTileRenderer(BaseRenderer):
+    """Passes encoded vector tiles through to the response."""
+
+    media_type = 'application/vnd.mapbox-vector-tile'
+    format = 'mvt'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # error responses have no meaningful tile representation
+        if not isinstance(data, bytes):
+            return b''
+        return data
+
+
+class IgnoreClientContentNegotiation(BaseContentNegotiation):
+    """Selects the first renderer of the view regardless of the Accept header sent."""
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
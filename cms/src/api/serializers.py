@@ -1,11 +1,12 @@
-from django.db.models import Subquery, OuterRef
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
 
+from api.querysets import prefetch_waypoints
 from cms.models import MemorialTag, LanguageTag, GenreTag, PeriodTag, Author, Memorial, AuthorName, \
     MemorialPath, \
     Level1Page, Level2Page, Level3Page
 from cms.models.base import BlogPage
-from cms.serializers import TranslationField, ImageSerializer
+from cms.serializers import TranslationField, ImageSerializer, ImageUrlListSerializer
 
 
 class BlogPageSerializer(serializers.ModelSerializer):
@@ -100,7 +101,8 @@ class AuthorListSerializer(serializers.ModelSerializer):
         return serializer.data
 
     def get_url(self, obj):
-        return obj.get_url()
+        # the request caches the site root paths of all authors
+        return obj.get_url(request=self.context.get('request'))
 
     class Meta:
         fields = (
@@ -117,6 +119,7 @@ class AuthorListSerializer(serializers.ModelSerializer):
             'url',
         )
         model = Author
+        list_serializer_class = ImageUrlListSerializer
 
 
 class AuthorDetailSerializer(AuthorListSerializer):
@@ -162,12 +165,28 @@ class AuthorDetailSerializer(AuthorListSerializer):
 class MemorialListSerializer(TitleSerializerMixin):
     title_image = ImageSerializer()
     position = serializers.SerializerMethodField()
-    memorial_types = MemorialTypeSerializer(source="memorial_type_tags", many=True)
+    memorial_types = serializers.SerializerMethodField()
 
     def get_position(self, obj):
         lat, lng = obj.coordinates.coords
         return round(lat, 5), round(lng, 5)
 
+    def get_memorial_types(self, obj):
+        from api.loaders import get_memorial_type_lookup
+
+        # list querysets annotate the ids, which saves a query per memorial
+        type_ids = getattr(obj, 'memorial_type_ids', None)
+        if type_ids is None:
+            type_ids = obj.memorial_type_tags.values_list('pk', flat=True)
+
+        # the context is shared by all items of a list, the lookup is resolved once per list
+        lookup = self.context.get('memorial_type_lookup')
+        if lookup is None:
+            lookup = self.context['memorial_type_lookup'] = get_memorial_type_lookup()
+
+        type_ids = set(type_ids)
+        return [tag for pk, tag in lookup.items() if pk in type_ids]
+
     class Meta:
         fields = (
             'id',
@@ -177,6 +196,26 @@ class MemorialListSerializer(TitleSerializerMixin):
             'memorial_types'
         )
         model = Memorial
+        list_serializer_class = ImageUrlListSerializer
+
+
+class MemorialClusterSerializer(serializers.Serializer):
+    id = serializers.SerializerMethodField()
+    count = serializers.IntegerField()
+    position = serializers.SerializerMethodField()
+    bbox = serializers.SerializerMethodField()
+
+    def get_id(self, obj):
+        # only single memorial clusters can be linked to their memorial
+        return obj['memorial_id'] if obj['count'] == 1 else None
+
+    def get_position(self, obj):
+        lat, lng = obj['centroid'].coords
+        return round(lat, 5), round(lng, 5)
+
+    def get_bbox(self, obj):
+        xmin, ymin, xmax, ymax = obj['extent']
+        return (round(xmin, 5), round(ymin, 5)), (round(xmax, 5), round(ymax, 5))
 
 
 class MemorialDetailSerializer(MemorialListSerializer):
@@ -189,15 +228,13 @@ class MemorialDetailSerializer(MemorialListSerializer):
     detailed_description = TranslationField()
 
     def get_authors(self, obj):
-        popular_name_qs = AuthorName.objects.filter(author_id=OuterRef('pk')).order_by('sort_order')[:1]
-        queryset = Author.objects.filter(memorials=obj).annotate(
-            academic_title=Subquery(popular_name_qs.values('title')),
-            first_name=Subquery(popular_name_qs.values('first_name')),
-            last_name=Subquery(popular_name_qs.values('last_name')),
-            birth_name=Subquery(popular_name_qs.values('birth_name')),
-        ).select_related('title_image').live().public()
-        serializer = AuthorListSerializer(queryset, many=True)
-        return serializer.data
+        # the authors of many memorials may have been loaded at once by the caller
+        summaries = self.context.get('author_summaries')
+        if summaries is None:
+            from api.loaders import load_author_summaries
+
+            summaries = load_author_summaries([obj.pk], context=self.context)
+        return summaries.get(obj.pk, [])
 
     class Meta:
         fields = (
@@ -233,9 +270,10 @@ class MemorialPathDetailSerializer(MemorialPathListSerializer):
     waypoints = serializers.SerializerMethodField()
 
     def get_waypoints(self, obj):
-        queryset = obj.waypoints.order_by('sort_order')
-        memorials = [x.memorial for x in queryset if x.memorial.live]
-        serializer = MemorialListSerializer(memorials, many=True, read_only=True)
+        if not hasattr(obj, 'public_waypoints'):
+            prefetch_related_objects([obj], prefetch_waypoints())
+        memorials = [x.memorial for x in obj.public_waypoints]
+        serializer = MemorialListSerializer(memorials, many=True, read_only=True, context=self.context)
         return serializer.data
 
     class Meta:
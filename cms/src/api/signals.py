@@ -0,0 +1,92 @@
+"""Signal handlers that keep cached API content in sync with the CMS."""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from wagtail.core.models import Page, PageViewRestriction
+from wagtail.core.signals import page_published, page_unpublished
+
+from api.cache import PAGE_VERSION_KEY, bump_content_version
+from api.models import Snapshot
+from api.snapshots import build_snapshots, delete_dependent_snapshots, delete_referencing_snapshots
+from api.suggest import warm_suggestion_indexes
+from cms.models import AgeGroupTag, DocumentMedia, GenreTag, ImageMedia, LanguageTag, MemorialTag, PeriodTag
+
+CONTENT_MODELS = (
+    AgeGroupTag,
+    DocumentMedia,
+    GenreTag,
+    ImageMedia,
+    LanguageTag,
+    MemorialTag,
+    PeriodTag,
+)
+
+
+def bump_content_version_on_commit(pages=False):
+    # requests served before the commit must not cache old content under the new version
+    transaction.on_commit(bump_content_version)
+    if pages:
+        transaction.on_commit(lambda: bump_content_version(PAGE_VERSION_KEY))
+        # the publishing worker refreshes its suggestions right away, others once they notice the new version
+        transaction.on_commit(warm_suggestion_indexes)
+
+
+@receiver(page_published)
+@receiver(page_unpublished)
+def on_page_changed(sender, instance, **kwargs):
+    delete_dependent_snapshots(instance)
+    build_snapshots(instance)
+    bump_content_version_on_commit(pages=True)
+
+
+@receiver(post_delete)
+def on_page_deleted(sender, instance, **kwargs):
+    # sent once for every model of the page's inheritance chain
+    if isinstance(instance, Page):
+        delete_dependent_snapshots(instance)
+        bump_content_version_on_commit(pages=True)
+
+
+def delete_subtree_snapshots(page):
+    Snapshot.objects.filter(page__path__startswith=page.path).delete()
+    # other pages embed the authors and memorials of the subtree, e.g. memorials their authors
+    for descendant in Page.objects.descendant_of(page, inclusive=True).specific():
+        delete_dependent_snapshots(descendant)
+
+
+@receiver(pre_save)
+def on_page_saving(sender, instance, **kwargs):
+    if isinstance(instance, Page) and instance.pk is not None:
+        instance._api_old_url_path = Page.objects.filter(pk=instance.pk).values_list('url_path', flat=True).first()
+
+
+@receiver(post_save)
+def on_page_saved(sender, instance, created=False, **kwargs):
+    # moves change the urls of the page and its descendants without publishing them
+    old_url_path = getattr(instance, '_api_old_url_path', None)
+    if created or old_url_path is None or old_url_path == instance.url_path:
+        return
+
+    instance._api_old_url_path = instance.url_path
+    delete_subtree_snapshots(instance)
+    bump_content_version_on_commit(pages=True)
+
+
+@receiver(post_save, sender=PageViewRestriction)
+@receiver(post_delete, sender=PageViewRestriction)
+def on_view_restriction_changed(sender, instance, **kwargs):
+    delete_subtree_snapshots(instance.page)
+    bump_content_version_on_commit(pages=True)
+
+
+def on_content_changed(sender, instance, created=False, **kwargs):
+    # snapshots embed titles, captions and names of existing tags and media
+    if not created:
+        delete_referencing_snapshots(instance)
+    bump_content_version_on_commit()
+
+
+for model in CONTENT_MODELS:
+    post_save.connect(on_content_changed, sender=model)
+    post_delete.connect(on_content_changed, sender=model)
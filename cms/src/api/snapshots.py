@@ -0,0 +1,195 @@
+"""Detail payloads of pages that are rendered once on publish and served as they are."""
+
+import inspect
+from hashlib import md5
+
+from django.conf import settings
+from django.db.models import Q, TextField
+from django.db.models.functions import Cast
+from django.utils import timezone
+from django.utils.translation import get_language, override
+from wagtail.core.models import Page
+
+import api.loaders
+import api.querysets
+import api.serializers
+import cms.blocks
+import cms.renditions
+import cms.serializers
+from api.models import Snapshot
+from api.querysets import annotate_popular_name
+from api.serializers import AuthorDetailSerializer, MemorialDetailSerializer, MemorialPathDetailSerializer, \
+    Level1Serializer, Level2Serializer, Level3Serializer, GenreSerializer, PeriodSerializer, MemorialTypeSerializer
+from cms.models import Author, Memorial, MemorialPath, Level1Page, Level2Page, Level3Page, DocumentMedia, \
+    GenreTag, ImageMedia, LanguageTag, MemorialTag, PeriodTag, Waypoint
+from cms.serializers import DocumentSerializer, ImageSerializer
+
+# content embedded into snapshots, its serializer and the kinds of snapshots it appears in
+REFERENCES = (
+    (ImageMedia, ImageSerializer, None),
+    (DocumentMedia, DocumentSerializer, None),
+    (GenreTag, GenreSerializer, (Snapshot.KIND_AUTHOR,)),
+    (LanguageTag, GenreSerializer, (Snapshot.KIND_AUTHOR,)),
+    (PeriodTag, PeriodSerializer, (Snapshot.KIND_AUTHOR,)),
+    (MemorialTag, MemorialTypeSerializer, (Snapshot.KIND_MEMORIAL, Snapshot.KIND_PATH)),
+)
+
+LEVELS = (
+    (Level1Page, Snapshot.KIND_DISCOVER, Level1Serializer),
+    (Level2Page, Snapshot.KIND_RESEARCH, Level2Serializer),
+    (Level3Page, Snapshot.KIND_MATERIAL, Level3Serializer),
+)
+
+
+def get_snapshot_schema():
+    """Return a hash of the code and settings that render the payloads, other snapshots are stale after a deploy."""
+    modules = (api.loaders, api.querysets, api.serializers, cms.blocks, cms.renditions, cms.serializers)
+    source = ''.join(inspect.getsource(x) for x in modules)
+    # rendition urls point to the direct paths or to the serve view depending on the setting
+    source += repr(settings.LIS_DIRECT_RENDITIONS)
+    return md5(source.encode()).hexdigest()
+
+
+SNAPSHOT_SCHEMA = get_snapshot_schema()
+
+
+def get_snapshot(kind, **lookup):
+    """Return the payload of the current snapshot in the current language or None if there is none."""
+    queryset = Snapshot.objects.filter(kind=kind, language=get_language(), schema=SNAPSHOT_SCHEMA, **lookup)
+    return queryset.values_list('payload', flat=True).first()
+
+
+def store_snapshot(page, kind, payload):
+    """Store the payload of the page in the current language."""
+    Snapshot.objects.update_or_create(
+        page_id=page.pk,
+        kind=kind,
+        language=get_language(),
+        defaults={'payload': payload, 'schema': SNAPSHOT_SCHEMA},
+    )
+
+
+def create_snapshot(page, kind, payload):
+    """
+    Store the payload of the page in the current language rendered on a miss.
+
+    Snapshots stored in the meantime, e.g. by a concurrent publish, are kept as they may be more
+    recent than the payload, only snapshots of stale serializers are replaced.
+    """
+    lookup = {'page_id': page.pk, 'kind': kind, 'language': get_language()}
+    updated = Snapshot.objects.filter(**lookup).exclude(schema=SNAPSHOT_SCHEMA).update(
+        payload=payload,
+        schema=SNAPSHOT_SCHEMA,
+        updated_at=timezone.now(),
+    )
+    if not updated:
+        Snapshot.objects.get_or_create(**lookup, defaults={'payload': payload, 'schema': SNAPSHOT_SCHEMA})
+
+
+def render_author(author):
+    instance = annotate_popular_name(Author.objects.filter(pk=author.pk)).select_related('title_image').get()
+    yield Snapshot.KIND_AUTHOR, AuthorDetailSerializer(instance).data
+
+    for model, kind, serializer_class in LEVELS:
+        level = model.objects.child_of(author).first()
+        if level is not None:
+            yield kind, serializer_class(level).data
+
+
+def render_memorial(memorial):
+    instance = Memorial.objects.select_related('title_image').get(pk=memorial.pk)
+    yield Snapshot.KIND_MEMORIAL, MemorialDetailSerializer(instance).data
+
+
+def render_memorial_path(memorial_path):
+    instance = MemorialPath.objects.get(pk=memorial_path.pk)
+    yield Snapshot.KIND_PATH, MemorialPathDetailSerializer(instance).data
+
+
+RENDERERS = (
+    (Author, render_author),
+    (Memorial, render_memorial),
+    (MemorialPath, render_memorial_path),
+)
+
+
+def get_snapshot_page(page):
+    """Return the page that holds the snapshots of the given page, e.g. the author of a level page."""
+    page = page.specific
+    if isinstance(page, tuple(model for model, kind, serializer_class in LEVELS)):
+        return page.get_parent().specific
+    return page
+
+
+def build_snapshots(page):
+    """Render and store the snapshots of a page in all languages or delete them if the page is not public."""
+    page = get_snapshot_page(page)
+    renderer = next((renderer for model, renderer in RENDERERS if isinstance(page, model)), None)
+    if renderer is None:
+        return
+
+    if not Page.objects.filter(pk=page.pk).live().public().exists():
+        Snapshot.objects.filter(page_id=page.pk).delete()
+        return
+
+    for language, name in settings.LANGUAGES:
+        with override(language):
+            kinds = []
+            for kind, payload in renderer(page):
+                store_snapshot(page, kind, payload)
+                kinds.append(kind)
+            Snapshot.objects.filter(page_id=page.pk, language=language).exclude(kind__in=kinds).delete()
+
+
+def delete_dependent_snapshots(page):
+    """Delete snapshots of other pages that embed content of the given specific page."""
+    for model, kind, serializer_class in LEVELS:
+        if isinstance(page, model):
+            Snapshot.objects.filter(kind=kind, page__path=page.path[:-page.steplen]).delete()
+
+    # pages that have just become visible are not embedded yet, their dependents are found by the relations,
+    # the payloads still find the dependents of deleted pages whose relations have been deleted with them
+    if isinstance(page, Author):
+        memorials = Memorial.remembered_authors.through.objects.filter(author_id=page.pk)
+        Snapshot.objects.filter(
+            Q(kind=Snapshot.KIND_MEMORIAL, payload__authors__contains=[{'id': page.pk}])
+            | Q(kind=Snapshot.KIND_MEMORIAL, page_id__in=memorials.values('memorial_id'))
+        ).delete()
+    elif isinstance(page, Memorial):
+        authors = Memorial.remembered_authors.through.objects.filter(memorial_id=page.pk)
+        paths = Waypoint.objects.filter(memorial_id=page.pk)
+        Snapshot.objects.filter(
+            Q(kind=Snapshot.KIND_AUTHOR, payload__memorials__contains=[page.pk])
+            | Q(kind=Snapshot.KIND_AUTHOR, page_id__in=authors.values('author_id'))
+            | Q(kind=Snapshot.KIND_PATH, payload__waypoints__contains=[{'id': page.pk}])
+            | Q(kind=Snapshot.KIND_PATH, page_id__in=paths.values('memorial_path_id'))
+        ).delete()
+
+
+def get_reference_pattern(serializer_class, pk):
+    """Return the beginning of a serialized object as it appears in the text of a jsonb payload."""
+    # jsonb orders the keys of objects by their length first, so `id` is followed by the shortest other key
+    keys = sorted((x for x in serializer_class.Meta.fields if x != 'id'), key=lambda x: (len(x), x))
+    return f'{{"id": {pk}, "{keys[0]}": '
+
+
+def delete_referencing_snapshots(instance):
+    """Delete the snapshots that embed the given image, document or tag, e.g. its title or urls."""
+    for model, serializer_class, kinds in REFERENCES:
+        if isinstance(instance, model):
+            queryset = Snapshot.objects.annotate(text=Cast('payload', TextField())).filter(
+                text__contains=get_reference_pattern(serializer_class, instance.pk)
+            )
+            if kinds is not None:
+                queryset = queryset.filter(kind__in=kinds)
+            queryset.delete()
+
+
+def build_all_snapshots():
+    """Rebuild the snapshots of all public pages and return their number."""
+    count = 0
+    for model, renderer in RENDERERS:
+        for page in model.objects.live().public().iterator():
+            build_snapshots(page)
+            count += 1
+    return count
@@ -0,0 +1,168 @@
+"""An in-process prefix index of the pages suggested while typing into the search box."""
+
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connections
+from django.utils.translation import get_language, override
+
+from api.cache import PAGE_VERSION_KEY, get_content_version
+from cms.models import Author, Memorial, MemorialPath
+
+SUGGESTION_TYPES = (
+    (Author, 'author', 'authors'),
+    (Memorial, 'memorial', 'memorials'),
+    (MemorialPath, 'path', 'paths'),
+)
+
+# versions and suggestion indexes by language, replaced as a whole once a rebuild has finished
+_suggestion_indexes = {}
+
+# threads that are building the suggestion indexes of a language
+_builds = {}
+_builds_lock = threading.Lock()
+
+
+def normalize(text):
+    """Return the words of the text in lower case and without accents, as indexed and searched."""
+    text = unicodedata.normalize('NFKD', text.lower())
+    text = ''.join(x for x in text if not unicodedata.combining(x))
+    return ' '.join(re.findall(r'\w+', text))
+
+
+class SuggestionIndex:
+    """
+    Sorted keys of the labels of a single suggestion type.
+
+    Each label is indexed once for every word it contains, e.g. `von goethe` and `goethe`, so
+    queries match the beginning of any word.
+    """
+
+    def __init__(self, entries):
+        keys = []
+        for text, suggestion in entries:
+            words = normalize(text).split()
+            keys.extend((' '.join(words[i:]), suggestion) for i in range(len(words)))
+        keys.sort(key=lambda x: x[0])
+
+        self.keys = [key for key, suggestion in keys]
+        self.suggestions = [suggestion for key, suggestion in keys]
+
+    def search(self, prefix, limit):
+        """Return up to limit distinct suggestions with a key that starts with the normalized prefix."""
+        results = OrderedDict()
+        position = bisect_left(self.keys, prefix)
+        while len(results) < limit and position < len(self.keys) and self.keys[position].startswith(prefix):
+            suggestion = self.suggestions[position]
+            results.setdefault(suggestion['id'], suggestion)
+            position += 1
+        return list(results.values())
+
+
+def get_suggestion(page, suggestion_type, label):
+    return OrderedDict((
+        ('id', page.pk),
+        ('type', suggestion_type),
+        ('label', label),
+        # urls do not depend on the request that happens to trigger a build
+        ('url', page.get_url()),
+    ))
+
+
+def get_author_entries():
+    queryset = Author.objects.live().public().only('url_path').prefetch_related('names')
+    for author in queryset:
+        names = list(author.names.all())
+        if not names:
+            continue
+
+        # the most popular name is the label, but the author is found by all of its names
+        suggestion = get_suggestion(author, 'author', str(names[0]))
+        for name in names:
+            yield str(name), suggestion
+            if name.i18n_birth_name:
+                yield name.i18n_birth_name, suggestion
+
+
+def get_page_entries(model, suggestion_type):
+    # the translated name is annotated by the manager, no content of the pages is loaded
+    for page in model.objects.live().public().only('url_path'):
+        yield page.name, get_suggestion(page, suggestion_type, page.name)
+
+
+def build_suggestion_indexes():
+    """Return the suggestion indexes of all live and public pages of the current language by type."""
+    indexes = OrderedDict()
+    for model, suggestion_type, key in SUGGESTION_TYPES:
+        if model is Author:
+            entries = get_author_entries()
+        else:
+            entries = get_page_entries(model, suggestion_type)
+        indexes[key] = SuggestionIndex(entries)
+    return indexes
+
+
+def _build(language, version):
+    try:
+        with override(language):
+            _suggestion_indexes[language] = (version, build_suggestion_indexes())
+    finally:
+        with _builds_lock:
+            _builds.pop(language, None)
+        # the thread opened its own database connection
+        connections.close_all()
+
+
+def start_build(language, version):
+    """Build the suggestion indexes of a language in a background thread unless a build is already running."""
+    with _builds_lock:
+        thread = _builds.get(language)
+        if thread is None:
+            thread = _builds[language] = threading.Thread(target=_build, args=(language, version), daemon=True)
+            thread.start()
+    return thread
+
+
+def warm_suggestion_indexes():
+    """Build the suggestion indexes of all languages in the background, e.g. when a worker starts or on publish."""
+    version = get_content_version(PAGE_VERSION_KEY)
+    for language, name in settings.LANGUAGES:
+        current = _suggestion_indexes.get(language)
+        if current is None or current[0] != version:
+            start_build(language, version)
+
+
+def get_suggestion_indexes():
+    """
+    Return the page version and the suggestion indexes of the current language.
+
+    Indexes are rebuilt in the background once pages have been published, requests are served from
+    the previous indexes meanwhile. Only requests of a worker that has no indexes yet wait for a build.
+    """
+    language = get_language()
+    version = get_content_version(PAGE_VERSION_KEY)
+
+    current = _suggestion_indexes.get(language)
+    if current is None:
+        start_build(language, version).join()
+        current = _suggestion_indexes.get(language)
+        if current is None:
+            # the build failed, its error has been reported by the thread
+            return None, OrderedDict((key, SuggestionIndex(())) for model, suggestion_type, key in SUGGESTION_TYPES)
+    elif current[0] != version:
+        start_build(language, version)
+
+    return current
+
+
+def suggest(indexes, query, limit):
+    """Return up to limit authors, memorials and paths whose labels contain a word starting with the query."""
+    prefix = normalize(query)
+    return OrderedDict(
+        (key, index.search(prefix, limit) if prefix else [])
+        for key, index in indexes.items()
+    )
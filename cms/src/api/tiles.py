@@ -0,0 +1,80 @@
+"""Renders Mapbox vector tiles of memorials in the database."""
+
+import math
+
+from django.contrib.gis.db.models.functions import Transform
+from django.contrib.gis.geos import Polygon
+from django.core.exceptions import EmptyResultSet
+from django.db import connection
+from django.db.models import Value
+
+from api.expressions import ArrayToString, AsMVTGeom, MakeEnvelope, memorial_type_ids
+from cms.models import Memorial
+
+TILE_LAYER = 'memorials'
+TILE_EXTENT = 4096
+TILE_BUFFER = 256
+TILE_MAX_ZOOM = 22
+WEB_MERCATOR_SRID = 3857
+WEB_MERCATOR_EXTENT = math.pi * 6378137
+
+
+def tile_bounds(z, x, y):
+    """Return the web mercator bounds of the tile as (xmin, ymin, xmax, ymax)."""
+    size = 2 * WEB_MERCATOR_EXTENT / 2 ** z
+    xmin = -WEB_MERCATOR_EXTENT + x * size
+    ymax = WEB_MERCATOR_EXTENT - y * size
+    return xmin, ymax - size, xmin + size, ymax
+
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= TILE_MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def render_memorial_tile(queryset, z, x, y):
+    """
+    Return the memorials of the queryset within the given tile as encoded vector tile.
+
+    Each feature carries the memorial id, its translated name and a comma separated
+    list of memorial type ids as properties.
+    """
+    bounds = tile_bounds(z, x, y)
+
+    # points within the buffer of adjacent tiles must be included to render symbols
+    # that overlap the tile border
+    margin = (bounds[2] - bounds[0]) * TILE_BUFFER / TILE_EXTENT
+    envelope = Polygon.from_bbox((
+        bounds[0] - margin,
+        bounds[1] - margin,
+        bounds[2] + margin,
+        bounds[3] + margin,
+    ))
+    envelope.srid = WEB_MERCATOR_SRID
+    envelope.transform(Memorial._meta.get_field('coordinates').srid)
+
+    features = Memorial.objects.filter(
+        pk__in=queryset.order_by().values('pk'),
+        coordinates__bboverlaps=envelope,
+    ).annotate(
+        memorial_types=ArrayToString(memorial_type_ids(), Value(',')),
+        geom=AsMVTGeom(
+            Transform('coordinates', WEB_MERCATOR_SRID),
+            MakeEnvelope(*bounds, WEB_MERCATOR_SRID),
+            extent=TILE_EXTENT,
+            buffer=TILE_BUFFER,
+        ),
+    ).order_by().values('id', 'name', 'memorial_types', 'geom')
+
+    try:
+        sql, params = features.query.sql_with_params()
+    except EmptyResultSet:
+        return b''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT ST_AsMVT(feature, '{TILE_LAYER}', {TILE_EXTENT}, 'geom') "
+            f"FROM ({sql}) AS feature",
+            params
+        )
+        tile, = cursor.fetchone()
+
+    return bytes(tile) if tile else b''
@@ -3,7 +3,7 @@ from rest_framework import routers
 
 from api.views import LanguageViewSet, GenreViewSet, PeriodViewSet, MemorialTypeViewSet, \
     MemorialViewSet, AuthorViewSet, \
-    MemorialPathViewSet, BlogPageViewSet
+    MemorialPathViewSet, BlogPageViewSet, SuggestView
 
 router = routers.DefaultRouter(trailing_slash=False)
 router.register('page', BlogPageViewSet, basename='page')
@@ -16,5 +16,6 @@ router.register('periods', PeriodViewSet, basename='period')
 router.register('memorialTypes', MemorialTypeViewSet, basename='memorialType')
 
 urlpatterns = [
+    url(r'^v2/suggest$', SuggestView.as_view(), name='suggest'),
     url(r'^v2/', include(router.urls)),
 ]
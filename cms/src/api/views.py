@@ -1,25 +1,42 @@
+from collections import OrderedDict
+
 import django_filters
-from django.db.models import OuterRef, Subquery, Prefetch, Count, Q
+from django.db.models import Prefetch, Count, Q
 from django.http import Http404
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
 from rest_framework import filters, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ParseError
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
-from api.filters import BoundingBoxFilter, PostgresSearchFilter, \
+from api.clusters import CLUSTER_MAX_ZOOM, cluster_memorials
+from api.compact import compact_memorials
+from api.conditional import get_page_etag, get_suggestion_etag
+from api.expressions import memorial_type_ids
+from api.filters import BoundingBoxFilter, PostgresSearchFilter, AuthorSimilarityFilter, \
     DistanceFilter, MemorialFilterSet, AuthorFilterSet
-from api.pagination import MemorialPagination
+from api.models import Snapshot
+from api.pagination import KeysetPagination, MemorialKeysetPagination, MemorialPagination
+from api.querysets import annotate_popular_name, prefetch_waypoints
+from api.renderers import IgnoreClientContentNegotiation, VectorTileRenderer
 from api.serializers import LanguageSerializer, PeriodSerializer, \
     MemorialTypeSerializer, GenreSerializer, MemorialDetailSerializer, AuthorDetailSerializer, \
-    AuthorListSerializer, MemorialListSerializer, MemorialPathDetailSerializer, \
+    AuthorListSerializer, MemorialClusterSerializer, MemorialListSerializer, MemorialPathDetailSerializer, \
     MemorialPathListSerializer, \
     Level1Serializer, Level2Serializer, Level3Serializer
-from cms.models import LanguageTag, PeriodTag, GenreTag, MemorialTag, Memorial, Author, AuthorName, \
+from api.snapshots import create_snapshot, get_snapshot
+from api.suggest import get_suggestion_indexes, suggest
+from api.tiles import is_valid_tile, render_memorial_tile
+from cms.models import LanguageTag, PeriodTag, GenreTag, MemorialTag, Memorial, Author, \
     MemorialPath, \
     Level1Page, Level2Page, Level3Page
 # Notice: All views in this page override the get_queryset method to make sure the language code
 #         is set appropriately. Otherwise the queryset will be prepared before any language
 #         information is available to the custom translation processor.
-from cms.models.base import BlogPage
+from cms.models.base import BlogPage, HomePage
 
 
 class ActionAwareReadOnlyModelViewSet(viewsets.ReadOnlyModelViewSet):
@@ -37,8 +54,73 @@ class ActionAwareReadOnlyModelViewSet(viewsets.ReadOnlyModelViewSet):
             return super().get_serializer_class()
 
 
-class BlogPageViewSet(ActionAwareReadOnlyModelViewSet):
+class ConditionalGetMixin:
+    """
+    Answers conditional GET requests before any queryset is evaluated or serialized.
+
+    The ETag is derived from the edit and publish timestamps of the pages of the
+    `validator_models`, the content version and the current language.
+    """
+
+    validator_models = ()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+
+        if request.method not in ('GET', 'HEAD') or not self.validator_models:
+            return
+
+        self.etag = get_page_etag(self.validator_models)
+        response = get_conditional_response(request, etag=quote_etag(self.etag))
+        if response is not None:
+            # replaces the handler of the request method the same way viewsets bind their actions
+            setattr(self, request.method.lower(), lambda *args, **kwargs: response)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'etag', None) and response.status_code in (200, 304):
+            response['ETag'] = quote_etag(self.etag)
+        return response
+
+
+class KeysetPaginationMixin:
+    """Switches to keyset pagination if the client sends a cursor parameter, e.g. `?cursor=`."""
+
+    keyset_pagination_class = KeysetPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.keyset_pagination_class.is_requested(self.request):
+            self._paginator = self.keyset_pagination_class()
+        return super().paginator
+
+
+class SnapshotRetrieveMixin:
+    """
+    Serves detail requests from the snapshot of the page rendered on publish.
+
+    Missing snapshots, e.g. of pages published before snapshots existed, are rendered and stored on the first request.
+    """
+
+    snapshot_kind = None
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {'page__{0}'.format(self.lookup_field): self.kwargs[lookup_url_kwarg]}
+        payload = get_snapshot(self.snapshot_kind, **lookup)
+
+        if payload is None:
+            instance = self.get_object()
+            payload = self.get_serializer(instance).data
+            create_snapshot(instance, self.snapshot_kind, payload)
+
+        return Response(payload)
+
+
+class BlogPageViewSet(ConditionalGetMixin, ActionAwareReadOnlyModelViewSet):
     lookup_field = 'slug'
+    validator_models = (BlogPage, HomePage)
 
     def get_queryset(self):
         return BlogPage.objects.live().public()
@@ -52,26 +134,23 @@ class BlogPageViewSet(ActionAwareReadOnlyModelViewSet):
             return BlogPageDetailSerializer
 
 
-class AuthorViewSet(ActionAwareReadOnlyModelViewSet):
+class AuthorViewSet(ConditionalGetMixin, SnapshotRetrieveMixin, KeysetPaginationMixin,
+                    ActionAwareReadOnlyModelViewSet):
     lookup_field = 'slug'
+    snapshot_kind = Snapshot.KIND_AUTHOR
+    validator_models = (Author, Memorial, Level1Page, Level2Page, Level3Page)
     filterset_class = AuthorFilterSet
     filter_backends = (
         django_filters.rest_framework.DjangoFilterBackend,
         PostgresSearchFilter,
+        AuthorSimilarityFilter,
         filters.OrderingFilter,
     )
     serializer_class = AuthorDetailSerializer
     list_serializer_class = AuthorListSerializer
 
     def get_queryset(self):
-        popular_name_qs = AuthorName.objects.filter(author_id=OuterRef('pk')).order_by('sort_order')[:1]
-        queryset = Author.objects.annotate(
-            academic_title=Subquery(popular_name_qs.values('title')),
-            first_name=Subquery(popular_name_qs.values('first_name')),
-            last_name=Subquery(popular_name_qs.values('last_name')),
-            birth_name=Subquery(popular_name_qs.values('birth_name')),
-        )
-
+        queryset = annotate_popular_name(Author.objects.all())
         queryset = queryset.select_related('title_image')
 
         if self.action == 'list':
@@ -85,39 +164,41 @@ class AuthorViewSet(ActionAwareReadOnlyModelViewSet):
 
         return queryset.public().live()
 
-    @action(detail=True)
-    def discover(self, request, slug=None):
+    def get_level(self, slug, model, kind, serializer_class):
+        payload = get_snapshot(kind, page__slug=slug)
+        if payload is not None:
+            return Response(payload)
+
         try:
-            page = Level1Page.objects.child_of(Author.objects.get(slug=slug)).get()
-        except (Level1Page.DoesNotExist, Author.DoesNotExist):
+            author = Author.objects.get(slug=slug)
+            page = model.objects.child_of(author).get()
+        except (model.DoesNotExist, Author.DoesNotExist):
             raise Http404
 
-        serializer = Level1Serializer(instance=page)
+        serializer = serializer_class(instance=page)
+        # only public authors have snapshots that are kept up to date
+        if Author.objects.filter(pk=author.pk).live().public().exists():
+            create_snapshot(author, kind, serializer.data)
         return Response(serializer.data)
 
     @action(detail=True)
-    def research(self, request, slug=None):
-        try:
-            page = Level2Page.objects.child_of(Author.objects.get(slug=slug)).get()
-        except (Level2Page.DoesNotExist, Author.DoesNotExist):
-            raise Http404
+    def discover(self, request, slug=None):
+        return self.get_level(slug, Level1Page, Snapshot.KIND_DISCOVER, Level1Serializer)
 
-        serializer = Level2Serializer(instance=page)
-        return Response(serializer.data)
+    @action(detail=True)
+    def research(self, request, slug=None):
+        return self.get_level(slug, Level2Page, Snapshot.KIND_RESEARCH, Level2Serializer)
 
     @action(detail=True)
     def material(self, request, slug=None):
-        try:
-            page = Level3Page.objects.child_of(Author.objects.get(slug=slug)).get()
-        except (Level3Page.DoesNotExist, Author.DoesNotExist):
-            raise Http404
+        return self.get_level(slug, Level3Page, Snapshot.KIND_MATERIAL, Level3Serializer)
 
-        serializer = Level3Serializer(instance=page)
-        return Response(serializer.data)
 
-
-class MemorialViewSet(ActionAwareReadOnlyModelViewSet):
+class MemorialViewSet(ConditionalGetMixin, SnapshotRetrieveMixin, KeysetPaginationMixin,
+                      ActionAwareReadOnlyModelViewSet):
+    snapshot_kind = Snapshot.KIND_MEMORIAL
     pagination_class = MemorialPagination
+    keyset_pagination_class = MemorialKeysetPagination
     filter_backends = (
         BoundingBoxFilter,
         DistanceFilter,
@@ -125,7 +206,15 @@ class MemorialViewSet(ActionAwareReadOnlyModelViewSet):
         PostgresSearchFilter,
         filters.OrderingFilter,
     )
+    # filters of the map modes, clusters and the compact payload, which are neither searched nor ordered
+    map_filter_backends = (
+        BoundingBoxFilter,
+        DistanceFilter,
+        django_filters.rest_framework.DjangoFilterBackend,
+    )
+    cluster_param = 'cluster'
     filterset_class = MemorialFilterSet
+    validator_models = (Memorial, Author)
     bbox_filter_field = 'coordinates'
     distance_filter_field = 'coordinates'
     serializer_class = MemorialDetailSerializer
@@ -133,25 +222,96 @@ class MemorialViewSet(ActionAwareReadOnlyModelViewSet):
 
     def get_queryset(self):
         """Overrides default to make sure language is set when processing the view."""
-        return Memorial.objects.select_related('title_image').public().live()
+        queryset = Memorial.objects.select_related('title_image')
+        if self.action == 'list':
+            # memorial types are resolved from an in-process lookup table by these ids
+            queryset = queryset.annotate(memorial_type_ids=memorial_type_ids())
+        return queryset.public().live()
+
+    def list(self, request, *args, **kwargs):
+        """Return clusters instead of memorials if a cluster zoom level is requested."""
+        if self.cluster_param in request.query_params:
+            return self.list_clusters(request)
+        return super().list(request, *args, **kwargs)
+
+    def list_clusters(self, request):
+        zoom_string = request.query_params[self.cluster_param]
+        try:
+            zoom = int(zoom_string)
+        except ValueError:
+            raise ParseError('Invalid zoom level supplied for parameter {0}'.format(self.cluster_param))
+
+        if not 0 <= zoom <= CLUSTER_MAX_ZOOM:
+            raise ParseError('Zoom level must be between 0 and {0}'.format(CLUSTER_MAX_ZOOM))
+
+        queryset = self.get_queryset()
+        for backend in self.map_filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+
+        clusters = cluster_memorials(queryset, zoom)
+        serializer = MemorialClusterSerializer(clusters, many=True)
+        return Response(OrderedDict([
+            ('count', len(serializer.data)),
+            ('zoom', zoom),
+            ('results', serializer.data),
+        ]))
+
+    @action(detail=False)
+    def compact(self, request):
+        """
+        Return all memorials matching the filters as parallel arrays, e.g. for the initial map view.
+
+        Names are only included if requested by `?names`. Clients may keep the payload and revalidate it by its ETag.
+        """
+        queryset = self.get_queryset()
+        for backend in self.map_filter_backends:
+            queryset = backend().filter_queryset(request, queryset, self)
+
+        response = Response(compact_memorials(queryset, names='names' in request.query_params))
+        patch_cache_control(response, public=True, no_cache=True)
+        # compressed after rendering so the compressed body is what ends up in the API cache
+        response.add_post_render_callback(lambda r: GZipMiddleware().process_response(request, r))
+        return response
+
+    @action(
+        detail=False,
+        url_path=r'tiles/(?P<z>\d+)/(?P<x>\d+)/(?P<y>\d+)\.mvt',
+        renderer_classes=(VectorTileRenderer,),
+        content_negotiation_class=IgnoreClientContentNegotiation,
+    )
+    def tiles(self, request, z=None, x=None, y=None):
+        """Return a vector tile of all memorials matching the memorial filter set."""
+        z, x, y = int(z), int(x), int(y)
+        if not is_valid_tile(z, x, y):
+            raise Http404
+
+        filter_backend = django_filters.rest_framework.DjangoFilterBackend()
+        queryset = filter_backend.filter_queryset(request, self.get_queryset(), self)
+        return Response(render_memorial_tile(queryset, z, x, y))
 
 
-class MemorialPathViewSet(ActionAwareReadOnlyModelViewSet):
+class MemorialPathViewSet(ConditionalGetMixin, SnapshotRetrieveMixin, ActionAwareReadOnlyModelViewSet):
+    snapshot_kind = Snapshot.KIND_PATH
+    validator_models = (MemorialPath, Memorial)
     serializer_class = MemorialPathDetailSerializer
     list_serializer_class = MemorialPathListSerializer
 
     def get_queryset(self):
         """Overrides default to make sure language is set when processing the view."""
-        return MemorialPath.objects.public().live()
+        queryset = MemorialPath.objects.public().live()
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(prefetch_waypoints())
+        return queryset
 
 
-class TagViewSet(viewsets.ReadOnlyModelViewSet):
+class TagViewSet(ConditionalGetMixin, viewsets.ReadOnlyModelViewSet):
     filter_backends = [
         filters.OrderingFilter,
     ]
 
 
 class LanguageViewSet(TagViewSet):
+    validator_models = (Author,)
     serializer_class = LanguageSerializer
 
     def get_queryset(self):
@@ -161,6 +321,7 @@ class LanguageViewSet(TagViewSet):
 
 
 class GenreViewSet(TagViewSet):
+    validator_models = (Author,)
     serializer_class = GenreSerializer
 
     def get_queryset(self):
@@ -170,6 +331,7 @@ class GenreViewSet(TagViewSet):
 
 
 class PeriodViewSet(TagViewSet):
+    validator_models = (Author,)
     serializer_class = PeriodSerializer
 
     def get_queryset(self):
@@ -179,9 +341,38 @@ class PeriodViewSet(TagViewSet):
 
 
 class MemorialTypeViewSet(TagViewSet):
+    validator_models = (Memorial,)
     serializer_class = MemorialTypeSerializer
 
     def get_queryset(self):
         return MemorialTag.objects.annotate(
             rel_count=Count('memorial_site', filter=Q(memorial_site__live=True))
         ).filter(rel_count__gt=0)
+
+
+class SuggestView(ConditionalGetMixin, APIView):
+    """
+    Suggests authors, memorials and paths while typing, e.g. `?q=goe&limit=5`.
+
+    The ETag is derived from the version of the suggestion indexes that are served, so
+    requests do not query the database once the indexes are built.
+    """
+
+    default_limit = 5
+    max_limit = 20
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            raise ParseError('Invalid limit supplied')
+        limit = max(0, min(limit, self.max_limit))
+
+        version, indexes = get_suggestion_indexes()
+        if version is not None:
+            self.etag = get_suggestion_etag(version)
+            response = get_conditional_response(request, etag=quote_etag(self.etag))
+            if response is not None:
+                return response
+
+        return Response(suggest(indexes, request.query_params.get('q', ''), limit))
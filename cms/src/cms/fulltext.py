@@ -0,0 +1,51 @@
+"""Per-language search vectors of the pages searched by the API."""
+
+from functools import reduce
+from operator import add
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchVector
+from django.db.models import Value
+from django.utils.translation import get_language, override
+
+from cms.models import Author, Memorial, MemorialPath
+from cms.models.base import I18nPage
+
+# text search configurations by language, Czech lacks a builtin stemmer and only has its accents removed
+SEARCH_CONFIGS = {
+    "en": "english",
+    "de": "german",
+    "cs": "lis_czech",
+}
+
+SEARCH_VECTOR_MODELS = (Author, Memorial, MemorialPath)
+
+
+def get_search_column(language=None):
+    """Return the name of the search vector field of the given or the current language."""
+    return f"search_{language or get_language()}"
+
+
+def get_search_vector(page):
+    """Return the weighted search vector of the specific page in the current language."""
+    vectors = [
+        SearchVector(Value(text), config=SEARCH_CONFIGS[get_language()], weight=weight)
+        for text, weight in page.get_search_texts()
+        if text
+    ]
+    return reduce(add, vectors) if vectors else None
+
+
+def update_search_vectors(page):
+    """Store the search vectors of the live content of a page in all languages."""
+    page = page.specific
+    if not isinstance(page, SEARCH_VECTOR_MODELS):
+        return
+
+    values = {}
+    for language, name in settings.LANGUAGES:
+        with override(language):
+            values[get_search_column(language)] = get_search_vector(page)
+
+    # the live content is updated without creating a revision
+    I18nPage.objects.filter(pk=page.pk).update(**values)
@@ -0,0 +1,97 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from cms.models.media import ImageMedia, ImageMediaRendition
+from cms.renditions import delete_files, delete_renditions, get_rendition_path, stat_files
+
+
+class Command(BaseCommand):
+    """Used to keep the media volume within its budget."""
+
+    help = "Remove the least recently used renditions until the media volume fits into its byte budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--budget",
+            type=int,
+            default=settings.LIS_MEDIA_BUDGET,
+            help="Byte budget of the media volume, defaults to LIS_MEDIA_BUDGET.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the number and size of the renditions that would be removed.",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Evict even if direct renditions are served, whose accesses are not recorded.",
+        )
+        parser.add_argument("--threads", type=int, default=8)
+
+    def handle(self, *args, **kwargs):
+        budget = kwargs["budget"]
+        if budget <= 0:
+            raise CommandError("No budget configured, set LIS_MEDIA_BUDGET or pass --budget.")
+        if settings.LIS_DIRECT_RENDITIONS and not kwargs["force"]:
+            # files served by nginx never update their access time, eviction would follow creation order instead
+            raise CommandError(
+                "Rendition accesses are not recorded while LIS_DIRECT_RENDITIONS is enabled, "
+                "pass --force to evict the oldest renditions regardless."
+            )
+
+        excess = self.get_volume_size() - budget
+        if excess <= 0:
+            self.stdout.write(self.style.SUCCESS("The media volume is within its budget."))
+            return
+
+        renditions = list(
+            ImageMediaRendition.objects.order_by("last_accessed_at", "pk").values_list(
+                "pk", "file", "image_id", "filter_spec"
+            )
+        )
+        files = stat_files(
+            (os.path.join(settings.MEDIA_ROOT, x[1]) for x in renditions),
+            max_workers=kwargs["threads"],
+        )
+
+        selected = []
+        size = 0
+        for rendition in renditions:
+            if size >= excess:
+                break
+            selected.append(rendition)
+            size += files.get(os.path.join(settings.MEDIA_ROOT, rendition[1]), (0, 0))[0]
+
+        summary = f"{len(selected)} renditions ({size / 1024 / 1024:.1f} MB)"
+        if kwargs["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Would evict {summary}."))
+            return
+
+        delete_renditions(((pk, name) for pk, name, image_id, filter_spec in selected), max_workers=kwargs["threads"])
+        # direct rendition files are hard links, which need to be removed as well to free any space
+        delete_files(self.get_direct_paths(selected), max_workers=kwargs["threads"])
+        self.stdout.write(self.style.SUCCESS(f"Evicted {summary}."))
+
+    def get_volume_size(self):
+        """Return the size of all files of the media volume, counting hard linked files once."""
+        inodes = {}
+        for root, dirs, files in os.walk(settings.MEDIA_ROOT):
+            for name in files:
+                try:
+                    result = os.stat(os.path.join(root, name))
+                except FileNotFoundError:
+                    continue
+                inodes[(result.st_dev, result.st_ino)] = result.st_size
+        return sum(inodes.values())
+
+    def get_direct_paths(self, renditions):
+        images = ImageMedia.objects.only(
+            "file", "file_hash", "focal_point_x", "focal_point_y", "focal_point_width", "focal_point_height",
+        ).in_bulk({image_id for pk, name, image_id, filter_spec in renditions})
+        return [
+            os.path.join(settings.MEDIA_ROOT, get_rendition_path(images[image_id], filter_spec))
+            for pk, name, image_id, filter_spec in renditions
+            if image_id in images
+        ]
@@ -0,0 +1,51 @@
+from concurrent.futures import as_completed
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+from cms.models.media import ImageMedia
+from cms.renditions import generate_renditions, get_executor
+from cms.serializers import STANDARD_FILTER_SPECS
+
+
+class Command(BaseCommand):
+    """Used to generate the standard image renditions."""
+
+    help = "Generate the missing standard renditions of all images in parallel."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--workers",
+            type=int,
+            help="Number of worker processes, defaults to LIS_RENDITION_WORKERS.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Check all images instead of only those lacking a standard rendition.",
+        )
+
+    def handle(self, *args, **kwargs):
+        specs = STANDARD_FILTER_SPECS
+        queryset = ImageMedia.objects.all()
+        if not kwargs["all"]:
+            queryset = queryset.annotate(
+                standard_renditions=Count("renditions", filter=Q(renditions__filter_spec__in=specs))
+            ).filter(standard_renditions__lt=len(specs))
+
+        executor = get_executor(kwargs["workers"])
+        futures = {
+            executor.submit(generate_renditions, image_id, specs): image_id
+            for image_id in queryset.values_list("pk", flat=True).iterator()
+        }
+
+        count = 0
+        for future in as_completed(futures):
+            image_id = futures[future]
+            try:
+                count += future.result()
+            except Exception as e:
+                self.stderr.write(self.style.ERROR(f"Failed to generate renditions of image id={image_id}: {e}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"Generated renditions of image id={image_id}."))
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {count} renditions of {len(futures)} images."))
@@ -1,21 +1,111 @@
+import os
+import time
+
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from cms.models.media import ImageMediaRendition
+from cms.models.media import ImageMedia, ImageMediaRendition
+from cms.renditions import DIRECT_RENDITIONS_DIR, delete_files, delete_renditions, get_rendition_path, stat_files
+from cms.serializers import STANDARD_FILTER_SPECS
+
+RENDITIONS_DIR = "images"
 
 
 class Command(BaseCommand):
     """Used to prune image renditions."""
 
-    help = "Remove all renditions from database and the file system."
+    help = (
+        "Remove renditions from database and the file system. Without any filter all renditions are removed, "
+        "filters are combined by OR."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--stale",
+            action="store_true",
+            help="Remove renditions of filter specs that are no longer served by the API.",
+        )
+        parser.add_argument(
+            "--orphans",
+            action="store_true",
+            help="Remove rendition files that no rendition refers to.",
+        )
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            metavar="DAYS",
+            help="Remove renditions whose files have not been modified for the given number of days.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report the number and size of the renditions that would be removed.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=1000)
+        parser.add_argument("--threads", type=int, default=8)
 
     def handle(self, *args, **kwargs):
-        count = 0
-        for rendition in ImageMediaRendition.objects.all():
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"Pruning rendition '{rendition.image.title}' ({rendition.filter_spec})."
-                )
+        threads = kwargs["threads"]
+        prune_all = not (kwargs["stale"] or kwargs["orphans"] or kwargs["older_than"] is not None)
+
+        renditions = dict(ImageMediaRendition.objects.values_list("pk", "file"))
+        selected = set()
+
+        if prune_all:
+            selected.update(renditions)
+        if kwargs["stale"]:
+            specs = STANDARD_FILTER_SPECS
+            selected.update(ImageMediaRendition.objects.exclude(filter_spec__in=specs).values_list("pk", flat=True))
+
+        files = stat_files(
+            (os.path.join(settings.MEDIA_ROOT, name) for name in renditions.values()),
+            max_workers=threads,
+        )
+        if kwargs["older_than"] is not None:
+            expires_at = time.time() - kwargs["older_than"] * 24 * 60 * 60
+            selected.update(
+                pk for pk, name in renditions.items()
+                if files.get(os.path.join(settings.MEDIA_ROOT, name), (0, 0))[1] < expires_at
+            )
+
+        orphan_files = {}
+        if kwargs["orphans"]:
+            # files of renditions created while pruning are not orphans
+            created_after = time.time() - 60 * 60
+            orphan_files = stat_files(self.find_orphans(renditions.values()), max_workers=threads)
+            orphan_files = {path: value for path, value in orphan_files.items() if value[1] < created_after}
+        orphans = list(orphan_files)
+
+        size = sum(files.get(os.path.join(settings.MEDIA_ROOT, renditions[pk]), (0, 0))[0] for pk in selected)
+        size += sum(value[0] for value in orphan_files.values())
+        summary = f"{len(selected)} renditions and {len(orphans)} orphaned files ({size / 1024 / 1024:.1f} MB)"
+
+        if kwargs["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Would prune {summary}."))
+            return
+
+        delete_renditions(
+            ((pk, renditions[pk]) for pk in sorted(selected)),
+            chunk_size=kwargs["chunk_size"],
+            max_workers=threads,
+        )
+        delete_files(orphans, max_workers=threads)
+        self.stdout.write(self.style.SUCCESS(f"Pruned {summary}."))
+
+    def find_orphans(self, names):
+        """Return the absolute paths of all rendition files that are neither referenced nor current direct files."""
+        referenced = {os.path.join(settings.MEDIA_ROOT, name) for name in names}
+
+        # direct rendition files are current as long as they belong to the current source file of an image
+        for image in ImageMedia.objects.only(
+            "file", "file_hash", "focal_point_x", "focal_point_y", "focal_point_width", "focal_point_height",
+        ).iterator():
+            referenced.update(
+                os.path.join(settings.MEDIA_ROOT, get_rendition_path(image, spec))
+                for spec in STANDARD_FILTER_SPECS
             )
-            rendition.delete()
-            count += 1
 
-        self.stdout.write(self.style.SUCCESS(f"Pruned {count} renditions."))
+        orphans = []
+        for directory in (RENDITIONS_DIR, DIRECT_RENDITIONS_DIR):
+            for root, dirs, files in os.walk(os.path.join(settings.MEDIA_ROOT, directory)):
+                orphans.extend(path for path in (os.path.join(root, x) for x in files) if path not in referenced)
+        return orphans
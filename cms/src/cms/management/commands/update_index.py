@@ -0,0 +1,99 @@
+from collections import defaultdict
+from hashlib import md5
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.utils import timezone
+from wagtail import __version__ as WAGTAIL_VERSION
+from wagtail.search.backends import get_search_backend
+from wagtail.search.index import RelatedFields, class_is_indexed, get_indexed_models
+from wagtail.search.management.commands import update_index
+from cms.models import SearchIndexCheckpoint, SearchIndexQueue
+
+
+def describe_search_field(field):
+    if isinstance(field, RelatedFields):
+        return "RelatedFields", field.field_name, [describe_search_field(x) for x in field.fields]
+    return type(field).__name__, sorted((key, repr(value)) for key, value in vars(field).items())
+
+
+def get_schema_hash(backend_name):
+    """Return a hash of everything that requires the index of the backend to be rebuilt if it changes."""
+    backends = getattr(settings, "WAGTAILSEARCH_BACKENDS", {})
+    schema = [WAGTAIL_VERSION, sorted((key, repr(value)) for key, value in backends.get(backend_name, {}).items())]
+    for model in get_indexed_models():
+        schema.append((model._meta.label, [describe_search_field(x) for x in model.get_search_fields()]))
+    return md5(repr(schema).encode()).hexdigest()
+
+
+class Command(update_index.Command):
+    """Used to update the search index incrementally, replaces the command of wagtail."""
+
+    help = (
+        "Rebuild the search index. With --incremental the index is only rebuilt if its schema has changed, "
+        "otherwise only the objects queued since the last run are indexed."
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Only index queued objects unless the index schema has changed since the last rebuild.",
+        )
+
+    def handle(self, **options):
+        started_at = timezone.now()
+        if options["backend_name"]:
+            backend_names = [options["backend_name"]]
+        else:
+            backend_names = getattr(settings, "WAGTAILSEARCH_BACKENDS", {"default": None}).keys()
+
+        for backend_name in backend_names:
+            schema_hash = get_schema_hash(backend_name)
+            checkpoint = SearchIndexCheckpoint.objects.filter(backend=backend_name).first()
+
+            if options["incremental"] and checkpoint is not None and checkpoint.schema_hash == schema_hash:
+                self.update_backend_incrementally(backend_name, started_at, chunk_size=options["chunk_size"])
+                continue
+
+            if options["incremental"]:
+                self.stdout.write(f"{backend_name}: The index schema has changed, rebuilding the index.")
+            self.update_backend(backend_name, schema_only=options["schema_only"], chunk_size=options["chunk_size"])
+            if not options["schema_only"]:
+                SearchIndexCheckpoint.objects.update_or_create(
+                    backend=backend_name, defaults={"schema_hash": schema_hash}
+                )
+
+        # objects queued while indexing stay queued for the next run
+        if not (options["backend_name"] or options["schema_only"]):
+            SearchIndexQueue.objects.filter(queued_at__lte=started_at).delete()
+
+    def update_backend_incrementally(self, backend_name, started_at, chunk_size):
+        """Index the objects queued until the start of the command, removing the entries of deleted objects."""
+        backend = get_search_backend(backend_name)
+
+        queued_ids = defaultdict(set)
+        queue = SearchIndexQueue.objects.filter(queued_at__lte=started_at)
+        for content_type_id, object_id in queue.values_list("content_type_id", "object_id"):
+            queued_ids[content_type_id].add(object_id)
+
+        count = 0
+        for content_type_id, object_ids in queued_ids.items():
+            model = ContentType.objects.get_for_id(content_type_id).model_class()
+            if model is None or not class_is_indexed(model):
+                continue
+
+            object_ids = sorted(object_ids)
+            for i in range(0, len(object_ids), chunk_size):
+                chunk = object_ids[i:i + chunk_size]
+                objects = list(model.get_indexed_objects().filter(pk__in=chunk))
+                backend.add_bulk(model, objects)
+
+                indexed_ids = {obj.pk for obj in objects}
+                for pk in chunk:
+                    if pk not in indexed_ids:
+                        backend.delete(model(pk=pk))
+                count += len(chunk)
+
+        self.stdout.write(self.style.SUCCESS(f"{backend_name}: Updated the index entries of {count} queued objects."))
@@ -0,0 +1,53 @@
+from hashlib import md5
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from cms.fulltext import SEARCH_CONFIGS, SEARCH_VECTOR_MODELS, update_search_vectors
+from cms.models import SearchIndexCheckpoint
+
+# the vectors are checkpointed like the search backends, see the update_index command
+CHECKPOINT_NAME = "search_vectors"
+
+
+def get_schema_hash():
+    """Return a hash of the configurations and weights the search vectors are computed with."""
+    schema = [sorted(SEARCH_CONFIGS.items())]
+    for model in SEARCH_VECTOR_MODELS:
+        schema.append((model._meta.label, model.search_vector_fields))
+    return md5(repr(schema).encode()).hexdigest()
+
+
+class Command(BaseCommand):
+    """Used to update the search vectors of pages."""
+
+    help = (
+        "Compute the search vectors of pages searched by the API. By default only pages without vectors are "
+        "updated, unless the configurations or weights have changed since the last run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute the search vectors of all pages.",
+        )
+
+    def handle(self, *args, **kwargs):
+        schema_hash = get_schema_hash()
+        checkpoint = SearchIndexCheckpoint.objects.filter(backend=CHECKPOINT_NAME).first()
+        update_all = kwargs["all"] or checkpoint is None or checkpoint.schema_hash != schema_hash
+
+        count = 0
+        for model in SEARCH_VECTOR_MODELS:
+            queryset = model.objects.all()
+            if not update_all:
+                # vectors are maintained on publish, only pages not published since the vectors were added lack them
+                queryset = queryset.filter(
+                    Q(search_en__isnull=True) | Q(search_de__isnull=True) | Q(search_cs__isnull=True)
+                )
+            for page in queryset.iterator():
+                update_search_vectors(page)
+                count += 1
+
+        SearchIndexCheckpoint.objects.update_or_create(backend=CHECKPOINT_NAME, defaults={"schema_hash": schema_hash})
+        self.stdout.write(self.style.SUCCESS(f"Updated the search vectors of {count} pages."))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from cms.models.base import I18nPage
+
+
+class Command(BaseCommand):
+    """Used to update the text lengths of pages."""
+
+    help = "Compute the plain text lengths of the rich text fields of all pages."
+
+    def handle(self, *args, **kwargs):
+        count = 0
+        for page in I18nPage.objects.all().specific().iterator():
+            text_lengths = page.get_text_lengths()
+            if text_lengths != page.text_lengths:
+                # the live content is updated without creating a revision
+                I18nPage.objects.filter(pk=page.pk).update(text_lengths=text_lengths)
+                count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Updated the text lengths of {count} pages."))
@@ -318,7 +318,14 @@ TXT = {
     "page.temporary_redirect.help": _(
         "A target url or slug that this page will redirect to."
     ),
+    "page.search_cs": _("Czech search vector"),
+    "page.search_de": _("German search vector"),
+    "page.search_en": _("English search vector"),
     "page.temporary_redirect": _("Temporary redirect target"),
+    "page.text_lengths.help": _(
+        "Plain text lengths of the rich text fields in each language, computed when the page is saved."
+    ),
+    "page.text_lengths": _("Text lengths"),
     "page.title_cs.help": _("Czech title of the page."),
     "page.title_cs": _("Czech title"),
     "page.title_de.help": _("German title of the page."),
@@ -327,12 +334,22 @@ TXT = {
     "page.title": _("Title"),
     "rendition.image.help": _("The image this rendition is based on."),
     "rendition.image": _("Image rendition"),
+    "rendition.last_accessed_at.help": _("Approximate time the rendition was last requested."),
+    "rendition.last_accessed_at": _("Last accessed at"),
     "memorial_path": _("Memorial path"),
     "memorial_path.plural": _("Memorial paths"),
     "memorial_path.description": _("Description"),
     "memorial_path.description.help": _("A short description of the highlights of this memorial path."),
     "memorial_path_waypoint": _("Waypoint"),
     "memorial_path_waypoint.plural": _("Waypoints"),
+    "search_index_checkpoint.backend": _("Search backend"),
+    "search_index_checkpoint.schema_hash": _("Schema hash"),
+    "search_index_checkpoint.updated_at": _("Updated at"),
+    "search_index_checkpoint": _("Search index checkpoint"),
+    "search_index_checkpoint.plural": _("Search index checkpoints"),
+    "search_index_queue.queued_at": _("Queued at"),
+    "search_index_queue": _("Queued search index update"),
+    "search_index_queue.plural": _("Queued search index updates"),
     "tag.description.help": _("A short description of the tag."),
     "tag.description": _("Description"),
     "tag.plural": _("Tags"),
@@ -0,0 +1,19 @@
+# Generated by Django 3.0.12 on 2021-08-20 10:12
+
+import django.contrib.postgres.fields.jsonb
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0052_auto_20210807_1337'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='i18npage',
+            name='text_lengths',
+            field=django.contrib.postgres.fields.jsonb.JSONField(blank=True, default=dict, editable=False, help_text='Plain text lengths of the rich text fields in each language, computed when the page is saved.', verbose_name='Text lengths'),
+        ),
+    ]
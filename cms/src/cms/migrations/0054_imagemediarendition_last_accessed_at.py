@@ -0,0 +1,19 @@
+# Generated by Django 3.0.12 on 2021-08-24 09:41
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0053_i18npage_text_lengths'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='imagemediarendition',
+            name='last_accessed_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, help_text='Approximate time the rendition was last requested.', verbose_name='Last accessed at'),
+        ),
+    ]
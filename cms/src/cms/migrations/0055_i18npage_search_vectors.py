@@ -0,0 +1,50 @@
+# Generated by Django 3.0.12 on 2021-08-26 10:12
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0054_imagemediarendition_last_accessed_at'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE TEXT SEARCH CONFIGURATION lis_czech ( COPY = simple );",
+            "DROP TEXT SEARCH CONFIGURATION lis_czech;"
+        ),
+        migrations.RunSQL(
+            "ALTER TEXT SEARCH CONFIGURATION lis_czech ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple;",
+            migrations.RunSQL.noop
+        ),
+        migrations.AddField(
+            model_name='i18npage',
+            name='search_cs',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Czech search vector'),
+        ),
+        migrations.AddField(
+            model_name='i18npage',
+            name='search_de',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='German search vector'),
+        ),
+        migrations.AddField(
+            model_name='i18npage',
+            name='search_en',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='English search vector'),
+        ),
+        migrations.AddIndex(
+            model_name='i18npage',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_en'], name='cms_i18npage_search_en_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='i18npage',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_de'], name='cms_i18npage_search_de_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='i18npage',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_cs'], name='cms_i18npage_search_cs_gin'),
+        ),
+    ]
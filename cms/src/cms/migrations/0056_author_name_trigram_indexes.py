@@ -0,0 +1,59 @@
+# Generated by Django 3.0.12 on 2021-08-30 14:27
+
+from django.db import migrations
+
+LANGUAGES = ('en', 'de', 'cs')
+
+
+def name_expression(language):
+    """Return the name expression of api.expressions.author_name, indexes are only used if both match."""
+    if language == 'en':
+        fields = ('first_name', 'last_name', 'birth_name')
+    else:
+        fields = (
+            f"COALESCE(NULLIF({name}_{language}, ''), {name})"
+            for name in ('first_name', 'last_name', 'birth_name')
+        )
+    return f"lis_author_name({', '.join(fields)})"
+
+
+def create_index(language, unaccent):
+    name = f"cms_author_name_{'unaccent' if unaccent else 'name'}_{language}_trgm"
+    expression = name_expression(language)
+    if unaccent:
+        expression = f"lis_unaccent({expression})"
+    return migrations.RunSQL(
+        f"CREATE INDEX {name} ON cms_author_name USING gin (({expression}) gin_trgm_ops);",
+        f"DROP INDEX {name};"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cms', '0055_i18npage_search_vectors'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE EXTENSION IF NOT EXISTS pg_trgm;",
+            migrations.RunSQL.noop
+        ),
+        # unaccent is only stable as its dictionary could change, indexes require an immutable function
+        migrations.RunSQL(
+            "CREATE FUNCTION lis_unaccent(text) RETURNS text AS "
+            "$$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$ "
+            "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;",
+            "DROP FUNCTION lis_unaccent(text);"
+        ),
+        migrations.RunSQL(
+            "CREATE FUNCTION lis_author_name(text, text, text) RETURNS text AS "
+            "$$ SELECT $1 || ' ' || $2 || ' ' || $3 $$ "
+            "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT;",
+            "DROP FUNCTION lis_author_name(text, text, text);"
+        ),
+    ] + [
+        create_index(language, unaccent)
+        for language in LANGUAGES
+        for unaccent in (False, True)
+    ]
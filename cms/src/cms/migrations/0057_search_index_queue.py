@@ -0,0 +1,44 @@
+# Generated by Django 3.0.12 on 2021-09-02 11:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('cms', '0056_author_name_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexCheckpoint',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('backend', models.CharField(max_length=255, unique=True, verbose_name='Search backend')),
+                ('schema_hash', models.CharField(max_length=32, verbose_name='Schema hash')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Updated at')),
+            ],
+            options={
+                'verbose_name': 'Search index checkpoint',
+                'verbose_name_plural': 'Search index checkpoints',
+                'db_table': 'cms_search_index_checkpoint',
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchIndexQueue',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField()),
+                ('queued_at', models.DateTimeField(auto_now=True, verbose_name='Queued at')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='contenttypes.ContentType')),
+            ],
+            options={
+                'verbose_name': 'Queued search index update',
+                'verbose_name_plural': 'Queued search index updates',
+                'db_table': 'cms_search_index_queue',
+                'unique_together': {('content_type', 'object_id')},
+            },
+        ),
+    ]
@@ -8,3 +8,4 @@ from .author import AuthorIndex, Author, AuthorName
 from .content import Level1Page, Level2Page, Level3Page
 from .memorial import LocationIndex, Memorial
 from .memorial_path import MemorialPathIndex, MemorialPath, Waypoint
+from .search import SearchIndexCheckpoint, SearchIndexQueue
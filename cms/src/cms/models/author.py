@@ -393,6 +393,14 @@ class Author(I18nPage):
             self.date_of_death_year, self.date_of_death_month, self.date_of_death_day
         )
 
+    def get_search_texts(self):
+        """Add all names of the author to the search texts."""
+        texts = super(Author, self).get_search_texts()
+        for name in self.names.all():
+            texts.append((str(name), "A"))
+            texts.append((name.i18n_birth_name, "A"))
+        return texts
+
     def get_context(self, request, *args, **kwargs):
         """Add furthor context information to preview requests."""
         context = super(Author, self).get_context(request, *args, **kwargs)
@@ -4,12 +4,16 @@ import logging
 from collections import namedtuple
 from typing import NewType, Tuple
 
+from django.conf import settings
+from django.contrib.postgres.fields import JSONField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.core.exceptions import PermissionDenied
 from django.db import models
 from django.db.models import Case, When, Q, F
 from django.utils.functional import cached_property
 from django.utils.translation import gettext_lazy as _, get_language, \
-    get_supported_language_variant
+    get_supported_language_variant, override
 from wagtail.admin.edit_handlers import (
     FieldPanel,
     ObjectList,
@@ -18,12 +22,12 @@ from wagtail.admin.edit_handlers import (
 )
 from wagtail.api import APIField
 from wagtail.core.blocks import CharBlock, RichTextBlock
-from wagtail.core.fields import StreamField
+from wagtail.core.fields import RichTextField, StreamField
 from wagtail.core.models import BaseViewRestriction, Page, PageManager
 from wagtail.search import index
 
 from cms.blocks import CustomImageChooserBlock
-from .helpers import TranslatedField
+from .helpers import TextExtractor, TranslatedField, get_plain_text
 from ..messages import TXT
 
 LOGGER = logging.getLogger("cms.models")
@@ -148,6 +152,22 @@ class I18nPage(Page):
         help_text=_(TXT["page.temporary_redirect.help"]),
     )
 
+    text_lengths = JSONField(
+        default=dict,
+        blank=True,
+        editable=False,
+        verbose_name=_(TXT["page.text_lengths"]),
+        help_text=_(TXT["page.text_lengths.help"]),
+    )
+
+    # maintained on publish for the page types searched by the API, see cms.fulltext
+    search_en = SearchVectorField(null=True, editable=False, verbose_name=_(TXT["page.search_en"]))
+    search_de = SearchVectorField(null=True, editable=False, verbose_name=_(TXT["page.search_de"]))
+    search_cs = SearchVectorField(null=True, editable=False, verbose_name=_(TXT["page.search_cs"]))
+
+    # translated fields and their weight within the search vectors in addition to the title
+    search_vector_fields = ()
+
     is_creatable = False
 
     search_fields = Page.search_fields + [
@@ -205,13 +225,36 @@ class I18nPage(Page):
         return self.i18n_draft_title or self.i18n_title
 
     def full_clean(self, *args, **kwargs):
-        """Set the translated draft titles according the translated title fields."""
+        """Set the translated draft titles according the translated title fields and update the text lengths."""
         if not self.draft_title_de:
             self.draft_title_de = self.title_de
         if not self.draft_title_cs:
             self.draft_title_cs = self.title_cs
+        self.text_lengths = self.get_text_lengths()
         super(I18nPage, self).full_clean(*args, **kwargs)
 
+    def get_text_lengths(self):
+        """Return the plain text lengths of all translated rich text fields by field name and language."""
+        text_lengths = {}
+        for field in self._meta.get_fields():
+            getter = f"i18n_{field.name}"
+            if not isinstance(field, RichTextField) or not hasattr(self, getter):
+                continue
+
+            text_lengths[field.name] = {}
+            for language, name in settings.LANGUAGES:
+                with override(language):
+                    text = TextExtractor.extract_text(getattr(self, getter) or "")
+                text_lengths[field.name][language] = len(text)
+        return text_lengths
+
+    def get_search_texts(self):
+        """Return the plain texts of the current language and their weights to build a search vector from."""
+        texts = [(self.i18n_title, "A")]
+        for name, weight in self.search_vector_fields:
+            texts.append((get_plain_text(getattr(self, f"i18n_{name}")), weight))
+        return texts
+
     def save_revision(
         self,
         user=None,
@@ -271,6 +314,13 @@ class I18nPage(Page):
     def __str__(self):
         return str(self.i18n_title)
 
+    class Meta:
+        indexes = [
+            GinIndex(fields=["search_en"], name="cms_i18npage_search_en_gin"),
+            GinIndex(fields=["search_de"], name="cms_i18npage_search_de_gin"),
+            GinIndex(fields=["search_cs"], name="cms_i18npage_search_cs_gin"),
+        ]
+
 
 class CategoryPage(I18nPage):
     """
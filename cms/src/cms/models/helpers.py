@@ -1,6 +1,7 @@
 """All purpose module for helper functions and classes to validate, format and output data."""
 
 import datetime
+from html.parser import HTMLParser
 
 from django.utils.formats import date_format
 from django.utils.translation import get_language
@@ -49,6 +50,43 @@ class TranslatedField(object):
         return default_value
 
 
+class TextExtractor(HTMLParser):
+    """Used to check for emtpy HTML"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.text = ""
+
+    def handle_data(self, data):
+        self.text += data
+
+    @classmethod
+    def extract_text(cls, data):
+        self = cls()
+        self.feed(data)
+        self.close()
+        return self.text
+
+
+def get_plain_text(value) -> str:
+    """Return the plain text of a string, rich text or stream field value, e.g. to be indexed."""
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return TextExtractor.extract_text(value)
+    if hasattr(value, "source"):
+        return TextExtractor.extract_text(value.source)
+    if hasattr(value, "block_type"):
+        return get_plain_text(value.value)
+    if isinstance(value, dict):
+        value = value.values()
+    try:
+        return " ".join(get_plain_text(x) for x in value)
+    except TypeError:
+        # other block values like images do not contain any text
+        return ""
+
+
 def validate_date(year: int = None, month: int = None, day: int = None):
     """Validate a given date for semantic integrity."""
     if year and month and day:
@@ -1,10 +1,13 @@
 """Custom media model implementations overriding Wagtail defaults."""
 
-from django.db import models
+import time
+
+from django.db import connection, models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from wagtail.core.models import CollectionMember
 from wagtail.documents.models import AbstractDocument
-from wagtail.images.models import AbstractImage, AbstractRendition
+from wagtail.images.models import AbstractImage, AbstractRendition, Filter
 from wagtail.search import index
 
 from ..messages import TXT
@@ -94,6 +97,53 @@ class ImageMedia(Media, AbstractImage):
         "focal_point_height",
     )
 
+    # longest time to wait for another process rendering the same rendition
+    RENDITION_LOCK_TIMEOUT = 30
+    RENDITION_LOCK_INTERVAL = 0.05
+
+    def get_rendition(self, filter):
+        """
+        Return the rendition of the given filter, generating it if it does not exist.
+
+        Generation is serialized per image and filter spec by a postgres advisory lock, so concurrent
+        requests of a new rendition wait for the first one instead of rendering the same image again.
+        The lock is held by the session and released explicitly, so it does not outlive the rendering
+        if the caller has opened a transaction.
+        """
+        if isinstance(filter, str):
+            filter = Filter(spec=filter)
+
+        rendition = self.renditions.filter(
+            filter_spec=filter.spec,
+            focal_point_key=filter.get_cache_key(self),
+        ).first()
+        if rendition is not None:
+            return rendition
+
+        with connection.cursor() as cursor:
+            if self.acquire_rendition_lock(cursor, filter.spec):
+                try:
+                    # a savepoint keeps the connection usable to release the lock if rendering fails
+                    with transaction.atomic():
+                        # finds the rendition if it was generated while waiting
+                        return super().get_rendition(filter)
+                finally:
+                    cursor.execute("SELECT pg_advisory_unlock(%s, hashtext(%s))", [self.pk, filter.spec])
+
+        # rendering unlocked is better than failing if the lock holder is stuck
+        return super().get_rendition(filter)
+
+    def acquire_rendition_lock(self, cursor, filter_spec):
+        """Wait for the rendition lock of the filter spec and return False if it could not be acquired in time."""
+        deadline = time.monotonic() + self.RENDITION_LOCK_TIMEOUT
+        while True:
+            cursor.execute("SELECT pg_try_advisory_lock(%s, hashtext(%s))", [self.pk, filter_spec])
+            if cursor.fetchone()[0]:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.RENDITION_LOCK_INTERVAL)
+
     class Meta:
         db_table = DB_TABLE_PREFIX + "image"
 
@@ -108,6 +158,13 @@ class ImageMediaRendition(AbstractRendition):
         verbose_name=_(TXT["rendition.image"]),
         help_text=_(TXT["rendition.image.help"]),
     )
+    last_accessed_at = models.DateTimeField(
+        default=timezone.now,
+        db_index=True,
+        editable=False,
+        verbose_name=_(TXT["rendition.last_accessed_at"]),
+        help_text=_(TXT["rendition.last_accessed_at.help"]),
+    )
 
     class Meta:
         db_table = DB_TABLE_PREFIX + "image_rendition"
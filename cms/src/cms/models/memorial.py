@@ -198,6 +198,13 @@ class Memorial(I18nPage):
     )
     i18n_detailed_description = TranslatedField.named("detailed_description")
 
+    search_vector_fields = (
+        ("introduction", "B"),
+        ("description", "B"),
+        ("detailed_description", "C"),
+        ("address", "D"),
+    )
+
     search_fields = I18nPage.search_fields + [
         index.SearchField("address"),
         index.SearchField("address_de"),
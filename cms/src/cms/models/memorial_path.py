@@ -48,6 +48,10 @@ class MemorialPath(I18nPage):
     )
     i18n_description = TranslatedField.named('description')
 
+    search_vector_fields = (
+        ('description', 'B'),
+    )
+
     search_fields = I18nPage.search_fields + [
         index.SearchField('description'),
         index.SearchField('description_de'),
@@ -0,0 +1,46 @@
+"""Bookkeeping of the search index, which is updated incrementally instead of being rebuilt on every boot."""
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+from wagtail.core.models import Page
+
+from ..messages import TXT
+from .base import DB_TABLE_PREFIX
+
+
+class SearchIndexQueue(models.Model):
+    """An object whose search index entries are outdated until `update_index --incremental` drains the queue."""
+
+    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, related_name="+")
+    object_id = models.PositiveIntegerField()
+    queued_at = models.DateTimeField(auto_now=True, verbose_name=_(TXT["search_index_queue.queued_at"]))
+
+    @classmethod
+    def enqueue(cls, instance):
+        """Queue the object for indexing, pages are indexed as their specific type."""
+        if isinstance(instance, Page) and instance.content_type_id:
+            content_type = ContentType.objects.get_for_id(instance.content_type_id)
+        else:
+            content_type = ContentType.objects.get_for_model(instance)
+        # updating the timestamp of a queued object keeps it queued while the queue is drained
+        cls.objects.update_or_create(content_type=content_type, object_id=instance.pk)
+
+    class Meta:
+        db_table = DB_TABLE_PREFIX + "search_index_queue"
+        unique_together = ("content_type", "object_id")
+        verbose_name = _(TXT["search_index_queue"])
+        verbose_name_plural = _(TXT["search_index_queue.plural"])
+
+
+class SearchIndexCheckpoint(models.Model):
+    """The schema of a search backend's index as of its last full rebuild."""
+
+    backend = models.CharField(max_length=255, unique=True, verbose_name=_(TXT["search_index_checkpoint.backend"]))
+    schema_hash = models.CharField(max_length=32, verbose_name=_(TXT["search_index_checkpoint.schema_hash"]))
+    updated_at = models.DateTimeField(auto_now=True, verbose_name=_(TXT["search_index_checkpoint.updated_at"]))
+
+    class Meta:
+        db_table = DB_TABLE_PREFIX + "search_index_checkpoint"
+        verbose_name = _(TXT["search_index_checkpoint"])
+        verbose_name_plural = _(TXT["search_index_checkpoint.plural"])
@@ -0,0 +1,296 @@
+"""Generation of image renditions outside of the request workers and their direct file urls."""
+
+import hashlib
+import logging
+import multiprocessing
+import os
+import random
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.utils import timezone
+from wagtail.images.exceptions import SourceImageIOError
+
+# Notice: The module is imported by the spawned worker processes before django is set up,
+#         models and serializers must therefore be imported within the functions.
+
+LOGGER = logging.getLogger("cms.renditions")
+
+# directory of the rendition files below MEDIA_ROOT that are served without django
+DIRECT_RENDITIONS_DIR = "renditions"
+
+EXTENSIONS = {
+    "jpeg": "jpg",
+    "bmp": "png",
+}
+
+RENDITION_CACHE_SECONDS = 24 * 60 * 60
+
+# longest time a request waits for a rendition rendered by the process pool
+RENDITION_WAIT_SECONDS = 30
+
+# accesses are written at most once per interval or number of renditions
+ACCESS_FLUSH_SECONDS = 60
+ACCESS_FLUSH_SIZE = 500
+
+_executor = None
+
+_access_lock = threading.Lock()
+_accessed_ids = set()
+_accessed_flushed_at = time.monotonic()
+
+
+def _init_worker():
+    # spawned processes start without any configured django apps
+    import django
+    django.setup()
+
+
+def get_executor(max_workers=None):
+    """Return the process pool of this process, which is created on first use."""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=max_workers or settings.LIS_RENDITION_WORKERS,
+            # forking a process with open database connections and threads is not safe
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+    return _executor
+
+
+def generate_renditions(image_id, filter_specs=None):
+    """Generate the missing renditions of an image and return the number of renditions checked."""
+    from cms.models import ImageMedia
+    from cms.serializers import STANDARD_FILTER_SPECS
+
+    if filter_specs is None:
+        filter_specs = STANDARD_FILTER_SPECS
+
+    try:
+        image = ImageMedia.objects.get(pk=image_id)
+    except ImageMedia.DoesNotExist:
+        return 0
+
+    count = 0
+    for filter_spec in filter_specs:
+        try:
+            rendition = image.get_rendition(filter_spec)
+            if settings.LIS_DIRECT_RENDITIONS:
+                write_rendition_file(image, filter_spec, rendition)
+            count += 1
+        except SourceImageIOError:
+            LOGGER.warning(f"Source file of image id={image_id} is missing, no renditions generated.")
+            break
+    return count
+
+
+def render_rendition(image_id, filter_spec):
+    """Return the id of the rendition of an image, generating it if it does not exist."""
+    from cms.models import ImageMedia
+
+    return ImageMedia.objects.get(pk=image_id).get_rendition(filter_spec).pk
+
+
+def get_pooled_rendition(image, filter_spec):
+    """
+    Return the rendition of an image, missing renditions are rendered by the process pool.
+
+    Request workers only wait for the pool, they never resize images themselves. Raises
+    SourceImageIOError if the source file is missing and concurrent.futures.TimeoutError if
+    the rendition is not ready within RENDITION_WAIT_SECONDS.
+    """
+    from wagtail.images.models import Filter
+
+    filter = Filter(spec=filter_spec)
+    rendition = image.renditions.filter(
+        filter_spec=filter.spec,
+        focal_point_key=filter.get_cache_key(image),
+    ).first()
+    if rendition is None:
+        future = get_executor().submit(render_rendition, image.pk, filter_spec)
+        rendition = image.renditions.get(pk=future.result(timeout=RENDITION_WAIT_SECONDS))
+    return rendition
+
+
+def _log_failure(future):
+    if future.exception() is not None:
+        LOGGER.error("Rendition generation failed.", exc_info=future.exception())
+
+
+def enqueue_renditions(image_id, filter_specs=None):
+    """Generate the standard renditions of an image in the process pool after the current transaction."""
+    from cms.serializers import STANDARD_FILTER_SPECS
+
+    specs = tuple(filter_specs or STANDARD_FILTER_SPECS)
+
+    def submit():
+        future = get_executor().submit(generate_renditions, image_id, specs)
+        future.add_done_callback(_log_failure)
+
+    transaction.on_commit(submit)
+
+
+def get_rendition_digest(image):
+    """Return a digest of the source file and the focal point of an image."""
+    source = "{0.file.name}:{0.file_hash}:{0.focal_point_x}:{0.focal_point_y}:{0.focal_point_width}:" \
+             "{0.focal_point_height}".format(image)
+    return hashlib.md5(source.encode()).hexdigest()[:16]
+
+
+def get_rendition_extension(image, filter_spec):
+    """Return the file extension of the rendition of an image."""
+    for operation in filter_spec.split("|"):
+        if operation.startswith("format-"):
+            output_format = operation[len("format-"):]
+            break
+    else:
+        output_format = os.path.splitext(image.file.name)[1][1:].lower()
+    return EXTENSIONS.get(output_format, output_format)
+
+
+def get_rendition_path(image, filter_spec):
+    """
+    Return the path of the rendition file of an image relative to the media root.
+
+    The path changes with the source file and the focal point, so the files can be cached forever.
+    """
+    return "{dir}/{image_id}/{digest}/{spec}.{extension}".format(
+        dir=DIRECT_RENDITIONS_DIR,
+        image_id=image.id,
+        digest=get_rendition_digest(image),
+        spec=filter_spec.replace("|", "."),
+        extension=get_rendition_extension(image, filter_spec),
+    )
+
+
+def get_rendition_url(image, filter_spec):
+    """Return the url of the rendition file of an image that is served by the web server."""
+    return urljoin(settings.MEDIA_URL, get_rendition_path(image, filter_spec))
+
+
+def write_rendition_file(image, filter_spec, rendition):
+    """Link the file of a rendition to its direct path and return the absolute path."""
+    path = os.path.join(settings.MEDIA_ROOT, get_rendition_path(image, filter_spec))
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # concurrent writers must never expose a partially written file
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        os.link(rendition.file.path, temp_path)
+    except OSError:
+        shutil.copyfile(rendition.file.path, temp_path)
+    os.replace(temp_path, path)
+    return path
+
+
+def stat_files(paths, max_workers=8):
+    """Return the size and modification time of the existing files by path, using a thread pool."""
+    def stat(path):
+        try:
+            result = os.stat(path)
+        except FileNotFoundError:
+            return path, None
+        return path, (result.st_size, result.st_mtime)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return {path: value for path, value in executor.map(stat, paths) if value is not None}
+
+
+def delete_files(paths, max_workers=8):
+    """Delete files using a thread pool and return the number of deleted files."""
+    def delete(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        return True
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return sum(executor.map(delete, paths))
+
+
+def delete_renditions(renditions, chunk_size=1000, max_workers=8):
+    """
+    Delete renditions given as (id, file name) pairs and their files.
+
+    Rows are deleted in chunks by plain SQL, so neither models are loaded nor delete signals sent.
+    Returns the number of deleted rows.
+    """
+    from cms.models import ImageMediaRendition
+
+    table = connection.ops.quote_name(ImageMediaRendition._meta.db_table)
+    count = 0
+    renditions = list(renditions)
+    for index in range(0, len(renditions), chunk_size):
+        chunk = renditions[index:index + chunk_size]
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {table} WHERE id = ANY(%s) RETURNING image_id, filter_spec",
+                [[pk for pk, name in chunk]],
+            )
+            deleted = cursor.fetchall()
+        count += len(deleted)
+        cache.delete_many([get_rendition_cache_key(image_id, filter_spec) for image_id, filter_spec in deleted])
+        delete_files((os.path.join(settings.MEDIA_ROOT, name) for pk, name in chunk), max_workers=max_workers)
+    return count
+
+
+def record_access(rendition_id):
+    """
+    Remember that a rendition was requested.
+
+    Only a sample of the accesses is recorded, see LIS_RENDITION_ACCESS_SAMPLE_RATE. They are
+    written in batches, which is accurate enough to tell hot renditions from those unused for days.
+    """
+    global _accessed_flushed_at
+
+    if random.random() >= settings.LIS_RENDITION_ACCESS_SAMPLE_RATE:
+        return
+
+    with _access_lock:
+        _accessed_ids.add(rendition_id)
+        elapsed = time.monotonic() - _accessed_flushed_at
+        if elapsed < ACCESS_FLUSH_SECONDS and len(_accessed_ids) < ACCESS_FLUSH_SIZE:
+            return
+        rendition_ids = list(_accessed_ids)
+        _accessed_ids.clear()
+        _accessed_flushed_at = time.monotonic()
+
+    from cms.models import ImageMediaRendition
+    ImageMediaRendition.objects.filter(pk__in=rendition_ids).update(last_accessed_at=timezone.now())
+
+
+def get_rendition_cache_key(image_id, filter_spec):
+    return "cms.rendition.{0}.{1}".format(image_id, hashlib.md5(filter_spec.encode()).hexdigest())
+
+
+def get_cached_rendition(image_id, filter_spec):
+    """Return the id and the url of a cached rendition or None."""
+    return cache.get(get_rendition_cache_key(image_id, filter_spec))
+
+
+def cache_rendition(rendition):
+    """Cache the id and the url of a rendition by its image and filter spec."""
+    key = get_rendition_cache_key(rendition.image_id, rendition.filter_spec)
+    cache.set(key, (rendition.pk, rendition.url), RENDITION_CACHE_SECONDS)
+
+
+def invalidate_cached_renditions(image):
+    """Remove all cached renditions of an image on commit, e.g. if its file or focal point changed."""
+    from cms.serializers import STANDARD_FILTER_SPECS
+
+    filter_specs = set(STANDARD_FILTER_SPECS)
+    filter_specs.update(image.renditions.values_list("filter_spec", flat=True))
+    keys = [get_rendition_cache_key(image.pk, filter_spec) for filter_spec in filter_specs]
+    # requests served before the commit could cache the old renditions again
+    transaction.on_commit(lambda: cache.delete_many(keys))
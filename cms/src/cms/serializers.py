@@ -1,15 +1,43 @@
 import base64
 import hashlib
 import hmac
-from html.parser import HTMLParser
+from collections import OrderedDict
+from functools import lru_cache
+from urllib.parse import quote
 
 from django.conf import settings
-from django.urls import reverse
+from django.urls import get_script_prefix, reverse
 from django.utils.encoding import force_text
+from django.utils.http import RFC3986_SUBDELIMS
+from django.utils.translation import get_language
 from rest_framework import serializers
 from wagtail.core.fields import RichTextField, StreamField
 
 from cms.models import ImageMedia, DocumentMedia
+from cms.models.helpers import TextExtractor
+from cms.renditions import get_rendition_url
+
+IMAGE_RENDITION_SPECS = OrderedDict([
+    ('thumb', 'fill-250x250|jpegquality-60'),
+    ('banner', 'fill-800x400|jpegquality-60'),
+    ('small', 'max-250x250|jpegquality-60'),
+    ('mid', 'max-500x500|jpegquality-60'),
+    ('large', 'max-800x800|jpegquality-60'),
+])
+
+
+def get_webp_filter_spec(filter_spec):
+    """Return the WebP variant of a JPEG filter spec."""
+    operations = [x for x in filter_spec.split('|') if not x.startswith('jpegquality-')]
+    return '|'.join(operations + ['format-webp'])
+
+
+IMAGE_WEBP_RENDITION_SPECS = OrderedDict(
+    (name, get_webp_filter_spec(filter_spec)) for name, filter_spec in IMAGE_RENDITION_SPECS.items()
+)
+
+# all filter specs the API refers to, which are generated in advance
+STANDARD_FILTER_SPECS = tuple(IMAGE_RENDITION_SPECS.values()) + tuple(IMAGE_WEBP_RENDITION_SPECS.values())
 
 
 def generate_signature(image_id, filter_spec, key=None):
@@ -30,29 +58,45 @@ def verify_signature(signature, image_id, filter_spec, key=None):
     return force_text(signature) == generate_signature(image_id, filter_spec, key=key)
 
 
+@lru_cache(maxsize=8192)
+def _generate_cached_signature(image_id, filter_spec, key):
+    return generate_signature(image_id, filter_spec, key)
+
+
+@lru_cache(maxsize=None)
+def _get_url_prefix(viewname, script_prefix):
+    # the prefix of the url pattern is the same for all images, only its arguments differ
+    url = reverse(viewname, args=('0', 0, '0'))
+    return url[:-len('0/0/0/')]
+
+
 def generate_image_url(image, filter_spec, viewname='wagtailimages_serve', key=None):
-    signature = generate_signature(image.id, filter_spec, key)
-    url = reverse(viewname, args=(signature, image.id, filter_spec))
+    """Return the signed url of the rendition of an image, memoizing the signature and the reversed url prefix."""
+    signature = _generate_cached_signature(image.id, filter_spec, key)
+    url = _get_url_prefix(viewname, get_script_prefix())
+    # quoted the same way as by reverse()
+    url += quote('{}/{}/{}/'.format(signature, image.id, filter_spec), safe=RFC3986_SUBDELIMS + '/~:@')
     url += image.file.name[len('original_images/'):]
     return url
 
 
-class TextExtractor(HTMLParser):
-    """Used to check for emtpy HTML"""
+def get_image_url(image, filter_spec):
+    """Return the url of the rendition file if renditions are served directly, the signed serve url otherwise."""
+    if settings.LIS_DIRECT_RENDITIONS:
+        return get_rendition_url(image, filter_spec)
+    return generate_image_url(image, filter_spec)
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.text = ""
 
-    def handle_data(self, data):
-        self.text += data
+def generate_image_urls(images, filter_specs=None):
+    """Return the rendition urls of many images by image id and filter spec."""
+    if filter_specs is None:
+        filter_specs = STANDARD_FILTER_SPECS
 
-    @classmethod
-    def extract_text(cls, data):
-        self = cls()
-        self.feed(data)
-        self.close()
-        return self.text
+    return {
+        (image.id, filter_spec): get_image_url(image, filter_spec)
+        for image in images
+        for filter_spec in filter_specs
+    }
 
 
 class TranslationField(serializers.Field):
@@ -65,7 +109,13 @@ class TranslationField(serializers.Field):
         value = getattr(instance, getter)
 
         if isinstance(field, RichTextField):
-            if TextExtractor.extract_text(value):
+            # pages store the text lengths when saved, other models need to be parsed
+            text_lengths = getattr(instance, 'text_lengths', None) or {}
+            length = text_lengths.get(self.source, {}).get(get_language())
+            if length is None:
+                length = len(TextExtractor.extract_text(value))
+
+            if length:
                 return value
             else:
                 return ''
@@ -90,18 +140,44 @@ class RenditionField(serializers.Field):
         value = getattr(instance, self.source) if self.source == 'self' else instance
 
         if value:
-            return generate_image_url(value, self.operation)
+            # list serializers may have signed the urls of all their images at once
+            image_urls = self.context.get('image_urls', {})
+            url = image_urls.get((value.id, self.operation))
+            if url is None:
+                url = get_image_url(value, self.operation)
+            return url
+
+
+class ImageUrlListSerializer(serializers.ListSerializer):
+    """Signs the rendition urls of the images of all items at once, e.g. of the title images of authors."""
+
+    image_attribute = 'title_image'
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, 'all') else data)
+        images = [getattr(item, self.image_attribute) for item in items]
+        self.context.setdefault('image_urls', {}).update(generate_image_urls(x for x in images if x))
+        return super().to_representation(items)
 
 
 class ImageSerializer(serializers.ModelSerializer):
     title = TranslationField()
     caption = TranslationField()
     copyright = serializers.CharField()
-    thumb = RenditionField(operation='fill-250x250|jpegquality-60')
-    banner = RenditionField(operation='fill-800x400|jpegquality-60')
-    small = RenditionField(operation='max-250x250|jpegquality-60')
-    mid = RenditionField(operation='max-500x500|jpegquality-60')
-    large = RenditionField(operation='max-800x800|jpegquality-60')
+    thumb = RenditionField(operation=IMAGE_RENDITION_SPECS['thumb'])
+    banner = RenditionField(operation=IMAGE_RENDITION_SPECS['banner'])
+    small = RenditionField(operation=IMAGE_RENDITION_SPECS['small'])
+    mid = RenditionField(operation=IMAGE_RENDITION_SPECS['mid'])
+    large = RenditionField(operation=IMAGE_RENDITION_SPECS['large'])
+    webp = serializers.SerializerMethodField()
+
+    def get_webp(self, obj):
+        """Return the urls of the WebP variants of the renditions, for clients that support them."""
+        image_urls = self.context.get('image_urls', {})
+        return OrderedDict(
+            (name, image_urls.get((obj.id, filter_spec)) or get_image_url(obj, filter_spec))
+            for name, filter_spec in IMAGE_WEBP_RENDITION_SPECS.items()
+        )
 
     class Meta:
         model = ImageMedia
@@ -115,6 +191,7 @@ class ImageSerializer(serializers.ModelSerializer):
             'small',
             'mid',
             'large',
+            'webp',
         )
 
 
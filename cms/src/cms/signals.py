@@ -0,0 +1,60 @@
+"""Signal handlers of the cms app."""
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from taggit.models import Tag
+from wagtail.core.signals import page_published
+from wagtail.search.index import class_is_indexed
+
+from cms.fulltext import update_search_vectors
+from cms.models import DocumentMedia, ImageMedia, SearchIndexQueue
+from cms.models.media import ImageMediaRendition
+from cms.renditions import enqueue_renditions, get_rendition_cache_key, invalidate_cached_renditions
+
+
+RENDITION_FIELDS = {"file", "focal_point_x", "focal_point_y", "focal_point_width", "focal_point_height"}
+
+
+@receiver(post_save, sender=ImageMedia)
+def on_image_saved(sender, instance, raw=False, update_fields=None, **kwargs):
+    # new files and focal points require new renditions
+    if raw or (update_fields and not RENDITION_FIELDS.intersection(update_fields)):
+        return
+    invalidate_cached_renditions(instance)
+    enqueue_renditions(instance.pk)
+
+
+@receiver(pre_delete, sender=ImageMedia)
+def on_image_deleted(sender, instance, **kwargs):
+    # the renditions are still there to tell their filter specs
+    invalidate_cached_renditions(instance)
+
+
+@receiver(post_delete, sender=ImageMediaRendition)
+def on_rendition_deleted(sender, instance, **kwargs):
+    key = get_rendition_cache_key(instance.image_id, instance.filter_spec)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+@receiver(page_published)
+def on_page_published(sender, instance, **kwargs):
+    update_search_vectors(instance)
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def on_indexed_object_changed(sender, instance, **kwargs):
+    # pages, images and documents are indexed, the queue is drained by `update_index --incremental`
+    if class_is_indexed(sender):
+        SearchIndexQueue.enqueue(instance)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(pre_delete, sender=Tag)
+def on_tag_changed(sender, instance, **kwargs):
+    # the names of tags are indexed with the media they are attached to
+    for model in (ImageMedia, DocumentMedia):
+        for media in model.objects.filter(tags=instance).only("pk"):
+            SearchIndexQueue.enqueue(media)
@@ -1,7 +1,6 @@
 """CMS url mappings."""
 from django.conf.urls import url
 from django.urls import path
-from wagtail.images.views.serve import ServeView
 
 from . import views
 
@@ -39,7 +38,7 @@ urlpatterns = [
     ),
     url(
         r'^images/([^/]*)/(\d*)/([^/]*)/[^/]*$',
-        ServeView.as_view(action='redirect'),
+        views.RenditionServeView.as_view(action='redirect'),
         name='wagtailimages_serve',
     ),
 ]
@@ -1,15 +1,27 @@
 """Additional views for the CMS."""
 
+import concurrent.futures
+import mimetypes
+
 from dal import autocomplete
 from django.contrib.auth import authenticate, login
 from django.db.models import Q
-from django.http import HttpResponseRedirect
-from django.shortcuts import render
+from django.core.exceptions import PermissionDenied
+from django.http import FileResponse, Http404, HttpResponse, HttpResponsePermanentRedirect, HttpResponseRedirect
+from django.shortcuts import get_object_or_404, render
+from django.utils.cache import patch_cache_control, patch_vary_headers
 from django.views import View
+from wagtail.images.exceptions import InvalidFilterSpecError, SourceImageIOError
+from wagtail.images.utils import verify_signature
+from wagtail.images.shortcuts import get_rendition_or_not_found
+from wagtail.images.views.serve import ServeView
 
 from . import forms
 from .models import GenreTag, LanguageTag, MemorialTag, PeriodTag, AgeGroupTag
-from cms.models import Author
+from cms.models import Author, ImageMedia
+from cms.renditions import RENDITION_WAIT_SECONDS, cache_rendition, get_cached_rendition, get_pooled_rendition, \
+    get_rendition_path, record_access, write_rendition_file
+from cms.serializers import IMAGE_RENDITION_SPECS, IMAGE_WEBP_RENDITION_SPECS, STANDARD_FILTER_SPECS
 
 
 class SignupView(View):
@@ -94,3 +106,129 @@ class AgeGroupAutocomplete(GenericAutocompleteView):
     """Age group tag autocomplete view."""
 
     model = AgeGroupTag
+
+
+def accepts_webp(request):
+    """Return whether the Accept header of the request explicitly accepts WebP with a quality above zero."""
+    for media_range in request.META.get("HTTP_ACCEPT", "").split(","):
+        media_type, *params = [x.strip() for x in media_range.split(";")]
+        if media_type.lower() != "image/webp":
+            continue
+        quality = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        return quality > 0
+    return False
+
+
+def rendition_unavailable():
+    """Return the response to requests of renditions the process pool has not rendered in time."""
+    response = HttpResponse("The image is being processed.", content_type="text/plain", status=503)
+    response["Retry-After"] = str(RENDITION_WAIT_SECONDS)
+    return response
+
+
+class RenditionFileView(View):
+    """
+    Writes a missing rendition file to its direct path and returns it.
+
+    The web server serves existing rendition files itself and only passes requests of missing ones.
+    """
+
+    def get(self, request, image_id, path):
+        image = get_object_or_404(ImageMedia, pk=image_id)
+
+        # only the standard renditions of the current source file may be written
+        paths = {get_rendition_path(image, spec): spec for spec in STANDARD_FILTER_SPECS}
+        filter_spec = paths.get(path)
+        if filter_spec is None:
+            raise Http404
+
+        try:
+            rendition = get_pooled_rendition(image, filter_spec)
+        except SourceImageIOError:
+            raise Http404
+        except concurrent.futures.TimeoutError:
+            return rendition_unavailable()
+
+        record_access(rendition.pk)
+        file_path = write_rendition_file(image, filter_spec, rendition)
+        content_type, encoding = mimetypes.guess_type(file_path)
+        response = FileResponse(open(file_path, "rb"), content_type=content_type)
+        patch_cache_control(response, public=True, max_age=365 * 24 * 60 * 60, immutable=True)
+        return response
+
+
+class RenditionServeView(ServeView):
+    """
+    Records the accesses of renditions served by the signed serve view.
+
+    Missing renditions are rendered by the process pool, requests only wait for them.
+    Redirects to cached renditions are answered without touching the database or the image file.
+    Clients accepting WebP get the WebP variant of the standard JPEG renditions, these responses
+    are redirected temporarily and cached for a short time only.
+    """
+
+    webp_filter_specs = dict(zip(IMAGE_RENDITION_SPECS.values(), IMAGE_WEBP_RENDITION_SPECS.values()))
+    negotiated = False
+    negotiated_cache_seconds = 60 * 60
+
+    def get(self, request, signature, image_id, filter_spec, filename=None):
+        if not verify_signature(signature.encode(), image_id, filter_spec, key=self.key):
+            raise PermissionDenied
+
+        # the signature covers the requested filter spec, the variant is chosen afterwards
+        self.negotiated = filter_spec in self.webp_filter_specs
+        if self.negotiated and accepts_webp(request):
+            filter_spec = self.webp_filter_specs[filter_spec]
+
+        response = self.get_response(image_id, filter_spec)
+        if self.negotiated:
+            patch_vary_headers(response, ["Accept"])
+            if response.status_code < 400:
+                patch_cache_control(response, max_age=self.negotiated_cache_seconds)
+        return response
+
+    def get_redirect(self, url):
+        # browsers keep permanent redirects for long and may ignore their Vary header
+        if self.negotiated:
+            return HttpResponseRedirect(url)
+        return HttpResponsePermanentRedirect(url)
+
+    def get_response(self, image_id, filter_spec):
+        if self.action == "redirect":
+            cached = get_cached_rendition(image_id, filter_spec)
+            if cached is not None:
+                rendition_id, url = cached
+                record_access(rendition_id)
+                return self.get_redirect(url)
+
+        image = get_object_or_404(ImageMedia, id=image_id)
+        try:
+            rendition = get_pooled_rendition(image, filter_spec)
+        except InvalidFilterSpecError:
+            return HttpResponse("Invalid filter spec: " + filter_spec, content_type="text/plain", status=400)
+        except SourceImageIOError:
+            # an unsaved rendition pointing to the not found image
+            rendition = get_rendition_or_not_found(image, filter_spec)
+        except concurrent.futures.TimeoutError:
+            return rendition_unavailable()
+
+        return getattr(self, self.action)(rendition)
+
+    def redirect(self, rendition):
+        # renditions of missing source files are not saved and must not be cached
+        if rendition.pk is not None:
+            record_access(rendition.pk)
+            cache_rendition(rendition)
+        return self.get_redirect(rendition.url)
+
+    def serve(self, rendition):
+        if rendition.pk is not None:
+            record_access(rendition.pk)
+        return super().serve(rendition)
@@ -7,3 +7,10 @@ bind = '0.0.0.0:8000'
 reload = to_boolean(os.getenv('DEBUG', False))
 max_number_workers = int(os.getenv('MAX_WORKERS', 3))
 workers = min(multiprocessing.cpu_count() * 2 + 1, max_number_workers)
+
+
+def post_worker_init(worker):
+    # suggestions are served from in-process indexes, which are built before the first keystroke arrives
+    from api.suggest import warm_suggestion_indexes
+
+    warm_suggestion_indexes()
@@ -100,9 +100,8 @@ MIDDLEWARE = [
     "debug_toolbar.middleware.DebugToolbarMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.locale.LocaleMiddleware",
-    "django.middleware.cache.UpdateCacheMiddleware",
+    "api.middleware.VersionedCacheMiddleware",
     "django.middleware.common.CommonMiddleware",
-    "django.middleware.cache.FetchFromCacheMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
@@ -153,6 +152,9 @@ DATABASES = {
 CACHE_MIDDLEWARE_ALIAS = "default"
 CACHE_MIDDLEWARE_SECONDS = 60
 CACHE_MIDDLEWARE_KEY_PREFIX = ""
+# API responses are invalidated by a content version bumped on publish
+API_CACHE_SECONDS = int(os.getenv("API_CACHE_SECONDS", 6 * 60 * 60))
+API_CACHE_URLS_REGEX = r'^(/en|/de|/cs)?/api/.*$'
 if DEBUG:
     CACHES = {
         "default": {
@@ -277,6 +279,12 @@ REST_FRAMEWORK = {
 
 # Application Settings
 LIS_SIGNUP_KEYWORD = os.getenv("LIS_SIGNUP_KEYWORD")
+LIS_RENDITION_WORKERS = int(os.getenv("LIS_RENDITION_WORKERS", 1))
+# serve renditions as files from MEDIA_URL instead of redirecting from the signed serve view
+LIS_DIRECT_RENDITIONS = to_boolean(os.getenv("LIS_DIRECT_RENDITIONS", False))
+# byte budget of the media volume kept by evicting the least recently used renditions, 0 disables eviction
+LIS_MEDIA_BUDGET = int(os.getenv("LIS_MEDIA_BUDGET", 0))
+LIS_RENDITION_ACCESS_SAMPLE_RATE = float(os.getenv("LIS_RENDITION_ACCESS_SAMPLE_RATE", 0.1))
 
 # CORS configuration
 CORS_ORIGIN_REGEX_WHITELIST = [
@@ -1,11 +1,17 @@
 """Application wide URL config."""
+import re
+from urllib.parse import urlparse
+
 from django.conf import settings
 from django.conf.urls.i18n import i18n_patterns
-from django.urls import include, path
+from django.urls import include, path, re_path
 from wagtail.admin import urls as wagtailadmin_urls
 from wagtail.core import urls as wagtail_urls
 from wagtail.documents import urls as wagtaildocs_urls
 
+from cms.renditions import DIRECT_RENDITIONS_DIR
+from cms.views import RenditionFileView
+
 urlpatterns = [
     path('cms/accounts/', include('django.contrib.auth.urls')),
     path('cms/wagtail/', include(wagtail_urls)),
@@ -14,6 +20,17 @@ urlpatterns = [
     path('cms/preview/', include('cms.urls')),
 ]
 
+if settings.LIS_DIRECT_RENDITIONS:
+    # requests of rendition files the web server could not find are passed to django
+    urlpatterns.append(re_path(
+        r'^{media}(?P<path>{dir}/(?P<image_id>\d+)/[0-9a-f]+/[^/]+)$'.format(
+            media=re.escape(urlparse(settings.MEDIA_URL).path.lstrip('/')),
+            dir=DIRECT_RENDITIONS_DIR,
+        ),
+        RenditionFileView.as_view(),
+        name='rendition_file',
+    ))
+
 urlpatterns += i18n_patterns(
     path('api/', include('api.urls'))
 )